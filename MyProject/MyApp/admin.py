@@ -1,3 +1,123 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.shortcuts import render
 
-# Register your models here.
+from .forms import UserAdminChangeForm, UserAdminCreationForm
+from .models import Achievement, Course, CourseContent, Enrollment, QuizAttempt, QuizQuestion, User
+from .pagination import EstimatedCountPaginator
+
+
+class BulkEnrollForm(forms.Form):
+    course = forms.ModelChoiceField(queryset=Course.objects.order_by('title'))
+
+
+@admin.action(description="Enroll selected users into a course")
+def enroll_in_course(modeladmin, request, queryset):
+    form = BulkEnrollForm(request.POST if 'apply' in request.POST else None)
+    if form.is_valid():
+        course = form.cleaned_data['course']
+        user_ids = queryset.values_list('pk', flat=True).iterator(chunk_size=1000)
+        created = Enrollment.objects.bulk_enroll(course, user_ids)
+        modeladmin.message_user(request, f"Enrolled {created} new user(s) in {course.title}.", messages.SUCCESS)
+        return None
+
+    return render(request, 'admin/bulk_enroll.html', {
+        **modeladmin.admin_site.each_context(request),
+        'title': "Enroll users into a course",
+        'opts': modeladmin.model._meta,
+        'form': form,
+        'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+        'select_across': request.POST.get('select_across', '0'),
+        'action': 'enroll_in_course',
+    })
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    # No COUNT(*) over the whole table: the changelist skips the "of N total"
+    # count and the paginator estimates or caps the filtered one.
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+
+@admin.register(User)
+class UserAdmin(LargeTableAdmin, BaseUserAdmin):
+    # Django's UserAdmin hashes passwords on add and links to its change-password
+    # form instead of exposing the hash as a text field.
+    form = UserAdminChangeForm
+    add_form = UserAdminCreationForm
+    list_display = ('email', 'full_name', 'role', 'is_active')
+    list_filter = ('role', 'is_active', 'is_staff')
+    search_fields = ('email', 'full_name')
+    ordering = ('email',)
+    readonly_fields = ('last_login', 'created_at', 'updated_at')
+    fieldsets = (
+        (None, {'fields': ('email', 'password')}),
+        ("Personal info", {'fields': ('full_name', 'username', 'phone', 'dob', 'gender', 'profile_picture')}),
+        ("Role and permissions", {
+            'fields': ('role', 'is_active', 'is_staff', 'is_superuser', 'groups', 'user_permissions'),
+        }),
+        ("Important dates", {'fields': ('last_login', 'created_at', 'updated_at')}),
+    )
+    add_fieldsets = (
+        (None, {
+            'classes': ('wide',),
+            'fields': ('email', 'full_name', 'role', 'usable_password', 'password1', 'password2'),
+        }),
+    )
+    actions = [enroll_in_course]
+
+
+@admin.register(Course)
+class CourseAdmin(LargeTableAdmin):
+    list_display = ('title', 'created_by', 'created_at')
+    list_select_related = ('created_by',)
+    search_fields = ('title',)
+    autocomplete_fields = ('created_by',)
+    date_hierarchy = 'created_at'
+
+
+@admin.register(Enrollment)
+class EnrollmentAdmin(LargeTableAdmin):
+    list_display = ('user', 'course', 'progress', 'score', 'enrolled_at', 'completed_at')
+    list_select_related = ('user', 'course')
+    search_fields = ('user__email', 'course__title')
+    autocomplete_fields = ('user', 'course')
+    date_hierarchy = 'enrolled_at'
+
+
+@admin.register(CourseContent)
+class CourseContentAdmin(LargeTableAdmin):
+    list_display = ('title', 'course', 'content_type', 'position')
+    list_select_related = ('course',)
+    list_filter = ('content_type',)
+    search_fields = ('title', 'course__title')
+    autocomplete_fields = ('course',)
+
+
+@admin.register(QuizQuestion)
+class QuizQuestionAdmin(LargeTableAdmin):
+    list_display = ('__str__', 'course', 'correct_option')
+    list_select_related = ('course',)
+    search_fields = ('question_text', 'course__title')
+    autocomplete_fields = ('course',)
+
+
+@admin.register(QuizAttempt)
+class QuizAttemptAdmin(LargeTableAdmin):
+    # QuizQuestion.__str__ includes its course title, hence question__course.
+    list_display = ('user', 'course', 'question', 'selected_option', 'is_correct', 'attempted_at')
+    list_select_related = ('user', 'course', 'question__course')
+    list_filter = ('is_correct',)
+    autocomplete_fields = ('user', 'course', 'question')
+    date_hierarchy = 'attempted_at'
+
+
+@admin.register(Achievement)
+class AchievementAdmin(LargeTableAdmin):
+    list_display = ('title', 'user', 'record_type', 'course', 'date_awarded')
+    list_select_related = ('user', 'course')
+    list_filter = ('record_type',)
+    search_fields = ('title', 'user__email')
+    autocomplete_fields = ('user', 'course')
@@ -0,0 +1,79 @@
+from datetime import timedelta
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, Q
+from django.utils import timezone
+
+from .models import CourseStats, Enrollment, QuestionStats, QuizAttempt, RollupWatermark
+
+WATERMARK = 'instructor_rollups'
+
+
+class RefreshResult(NamedTuple):
+    courses: int
+    questions: int
+    full: bool
+
+
+def refresh_rollups(full=False):
+    """Bring CourseStats/QuestionStats up to date and advance the watermark.
+
+    Only questions and courses touched since the watermark are re-aggregated. A
+    resubmitted quiz overwrites the earlier QuizAttempt row, so a touched question is
+    recounted from its current rows rather than incremented. Pass ``full`` after
+    deleting enrollments or attempts, which leave no timestamp behind.
+    """
+    started = timezone.now()
+    mark = None
+    if not full:
+        mark = RollupWatermark.objects.filter(name=WATERMARK).values_list('value', flat=True).first()
+
+    attempts = QuizAttempt.objects.all()
+    enrollments = Enrollment.objects.all()
+    if mark is not None:
+        recent_attempts = QuizAttempt.objects.filter(attempted_at__gt=mark)
+        recent_enrollments = Enrollment.objects.filter(Q(enrolled_at__gt=mark) | Q(completed_at__gt=mark))
+        attempts = attempts.filter(question_id__in=recent_attempts.values('question_id'))
+        enrollments = enrollments.filter(
+            Q(course_id__in=recent_attempts.values('course_id'))
+            | Q(course_id__in=recent_enrollments.values('course_id'))
+        )
+
+    question_rows = [
+        QuestionStats(question_id=row['question_id'], course_id=row['course_id'],
+                      attempt_count=row['attempts'], correct_count=row['correct'])
+        for row in attempts.values('question_id', 'course_id').order_by().annotate(
+            attempts=Count('pk'), correct=Count('pk', filter=Q(is_correct=True)),
+        )
+    ]
+    course_rows = [
+        CourseStats(course_id=row['course_id'], enrollment_count=row['enrolled'],
+                    completed_count=row['completed'], average_score=row['average'] or 0)
+        for row in enrollments.values('course_id').order_by().annotate(
+            enrolled=Count('pk'), completed=Count('pk', filter=Q(completed_at__isnull=False)),
+            average=Avg('score'),
+        )
+    ]
+
+    with transaction.atomic():
+        if mark is None:
+            # Drop rollups whose rows were all deleted since they were written.
+            QuestionStats.objects.exclude(question_id__in=attempts.values('question_id')).delete()
+            CourseStats.objects.exclude(course_id__in=enrollments.values('course_id')).delete()
+        QuestionStats.objects.bulk_create(
+            question_rows, batch_size=1000, update_conflicts=True, unique_fields=['question'],
+            update_fields=['attempt_count', 'correct_count'],
+        )
+        CourseStats.objects.bulk_create(
+            course_rows, batch_size=1000, update_conflicts=True, unique_fields=['course'],
+            update_fields=['enrollment_count', 'completed_count', 'average_score', 'refreshed_at'],
+        )
+        # Rows stamped just before ``started`` may commit after we read; the
+        # overlap makes the next run look at them again. Recounting is idempotent.
+        RollupWatermark.objects.update_or_create(
+            name=WATERMARK,
+            defaults={'value': started - timedelta(seconds=settings.ANALYTICS_WATERMARK_OVERLAP)},
+        )
+    return RefreshResult(len(course_rows), len(question_rows), mark is None)
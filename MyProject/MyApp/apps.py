@@ -4,4 +4,5 @@ class MyappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'MyApp'
     def ready(self):
+        import MyApp.checks
         import MyApp.signals
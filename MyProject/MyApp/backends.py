@@ -0,0 +1,37 @@
+from django.contrib.auth.backends import ModelBackend
+
+from .models import User
+
+
+class EmailRoleBackend(ModelBackend):
+    """Authenticate by email and, from the login form, role in a single indexed lookup.
+
+    A wrong role is treated exactly like an unknown email: one dummy password hash is
+    run so the response time does not reveal which accounts exist.
+    """
+
+    def authenticate(self, request, email=None, password=None, role=None, username=None, **kwargs):
+        # The admin login form passes the email as ``username``.
+        email = email or username or kwargs.get(User.USERNAME_FIELD)
+        if email is None or password is None:
+            return None
+        users = User.objects.filter(email=User.objects.normalize_email(email))
+        if role is not None:
+            users = users.filter(role=role)
+        user = users.first()
+        if user is None:
+            User().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    def get_user(self, user_id):
+        # Load the Profile in the same query; the nav avatar and profile page need it.
+        user = User.objects.select_related('profile').filter(pk=user_id).first()
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        # ModelBackend.aget_user does its own lookup; keep the profile join for ASGI views.
+        user = await User.objects.select_related('profile').filter(pk=user_id).afirst()
+        return user if user is not None and self.user_can_authenticate(user) else None
@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+# -----------------------------
+# Version counters
+# -----------------------------
+# Cached entries embed a version number in their key, so bumping it
+# invalidates every copy at once (in every process) without a delete_pattern.
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted key never reuses an old version.
+        cache.add(key, int(time.time()), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_version(key):
+    # Same as get_version(), through the cache's async API.
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, int(time.time()), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_version(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        return get_version(key)
+
+
+# -----------------------------
+# Catalog version
+# -----------------------------
+CATALOG_VERSION_KEY = 'catalog:version'
+
+
+async def aget_catalog_version():
+    return await aget_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    bump_version(CATALOG_VERSION_KEY)
+
+
+# -----------------------------
+# Per-user profile version
+# -----------------------------
+# Keys the cached nav bar and profile header fragments of one user.
+def profile_version_key(user_id):
+    return f'profile:version:{user_id}'
+
+
+def get_profile_version(user_id):
+    return get_version(profile_version_key(user_id))
+
+
+async def aget_profile_version(user_id):
+    return await aget_version(profile_version_key(user_id))
+
+
+def bump_profile_version(user_id):
+    bump_version(profile_version_key(user_id))
+
+
+# -----------------------------
+# Process-local LRU
+# -----------------------------
+class LocalLRUCache:
+    """A small thread-safe LRU dict that sits in front of the shared cache.
+
+    With ``timeout`` (seconds), entries also expire, which bounds how long a worker
+    can keep serving a value it has not seen invalidated.
+    """
+
+    def __init__(self, maxsize=128, timeout=None):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            expires, value = self._data[key]
+            if expires is not None and expires <= time.monotonic():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.timeout if self.timeout is not None else None
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
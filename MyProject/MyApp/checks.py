@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+CACHE_SESSION_ENGINES = {
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+}
+PER_PROCESS_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+@register(Tags.caches)
+def check_session_cache_is_shared(app_configs, **kwargs):
+    # A logout or flush() only evicts the cached session in the worker that
+    # handled it; other workers would keep authenticating the old session key.
+    if settings.SESSION_ENGINE not in CACHE_SESSION_ENGINES:
+        return []
+    backend = settings.CACHES.get(settings.SESSION_CACHE_ALIAS, {}).get('BACKEND')
+    if backend not in PER_PROCESS_CACHES:
+        return []
+    return [Error(
+        f"{settings.SESSION_ENGINE} sessions need a cache shared by every worker, not {backend}.",
+        hint="Set REDIS_URL, or SESSION_BACKEND=db.",
+        id='MyApp.E001',
+    )]
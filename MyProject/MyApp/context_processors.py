@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from .caching import get_profile_version
+
+
+def profile_fragments(request):
+    """Key and lifetime for the per-user ``{% cache %}`` fragments (nav bar, profile header).
+
+    The version is only fetched from the cache if a template actually renders one.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {
+        'profile_version': SimpleLazyObject(lambda: get_profile_version(user.pk)),
+        'profile_fragment_timeout': settings.PROFILE_FRAGMENT_TIMEOUT,
+    }
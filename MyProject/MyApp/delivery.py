@@ -0,0 +1,162 @@
+import hashlib
+import mimetypes
+import re
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def file_etag(field_file, size, modified):
+    stamp = f'{field_file.name}:{size}:{modified.timestamp() if modified else ""}'
+    return f'"{hashlib.md5(stamp.encode()).hexdigest()}"'
+
+
+def parse_range(header, size):
+    """Return ``(start, end)`` (inclusive) for a single byte range, or None to send the whole file.
+
+    Raises ValueError for a syntactically valid range that cannot be satisfied. Invalid
+    ranges (last before first) are ignored and multi-range requests are answered with the
+    full body, as RFC 9110 allows.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes.
+        length = int(last)
+        if length == 0 or size == 0:
+            # Nothing to send from an empty file: unsatisfiable, not "0--1".
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError(header)
+    end = min(int(last), size - 1) if last else size - 1
+    return start, end
+
+
+def iter_file_range(field_file, start, length, chunk_size):
+    with field_file.open('rb') as handle:
+        handle.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = handle.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def aiter_file_range(field_file, start, length, chunk_size):
+    # Reads run in the thread pool (they touch no database, so they need not be
+    # serialised on the main thread); between chunks the event loop is free.
+    def read(call, *args):
+        return sync_to_async(call, thread_sensitive=False)(*args)
+
+    handle = await read(field_file.storage.open, field_file.name, 'rb')
+    try:
+        await read(handle.seek, start)
+        remaining = length
+        while remaining > 0:
+            chunk = await read(handle.read, min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        await read(handle.close)
+
+
+def _modified_time(field_file):
+    try:
+        return field_file.storage.get_modified_time(field_file.name)
+    except NotImplementedError:
+        return None
+
+
+def sendfile_response(field_file, content_type):
+    """Hand the transfer to the web server (nginx X-Accel-Redirect or Apache/lighttpd X-Sendfile)."""
+    response = HttpResponse(content_type=content_type)
+    if settings.CONTENT_SENDFILE_MODE == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = settings.CONTENT_ACCEL_REDIRECT_PREFIX + quote(field_file.name)
+    else:
+        response['X-Sendfile'] = field_file.path
+    return response
+
+
+def serve_file(request, field_file, stream=None):
+    """Serve a FileField honouring ETag/If-None-Match, If-Range and single byte ranges.
+
+    Bodies are streamed in CONTENT_STREAM_CHUNK_SIZE chunks, so a seek inside a lecture
+    video only reads and sends the requested bytes. ``stream`` replaces iter_file_range
+    (and FileResponse for full bodies); aserve_file passes an async iterator under ASGI.
+    """
+    content_type = mimetypes.guess_type(field_file.name)[0] or 'application/octet-stream'
+    if settings.CONTENT_SENDFILE_MODE:
+        # The web server handles Range and conditional headers itself.
+        return sendfile_response(field_file, content_type)
+
+    size = field_file.size
+    modified = _modified_time(field_file)
+    etag = file_etag(field_file, size, modified)
+    last_modified = modified.timestamp() if modified else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        byte_range = None
+        if_range = request.headers.get('If-Range')
+        if not if_range or etag in parse_etags(if_range):
+            try:
+                byte_range = parse_range(request.headers.get('Range'), size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+
+        if byte_range is None and stream is None:
+            response = FileResponse(field_file.open('rb'), content_type=content_type)
+            response.block_size = settings.CONTENT_STREAM_CHUNK_SIZE
+        elif byte_range is None:
+            response = StreamingHttpResponse(
+                stream(field_file, 0, size, settings.CONTENT_STREAM_CHUNK_SIZE),
+                content_type=content_type,
+            )
+            response['Content-Length'] = str(size)
+        else:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                (stream or iter_file_range)(field_file, start, length, settings.CONTENT_STREAM_CHUNK_SIZE),
+                status=206,
+                content_type=content_type,
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(length)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private'
+    if modified:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+async def aserve_file(request, field_file):
+    """serve_file() for async views: under ASGI the body is an async iterator, so a
+    slow client holds an event-loop task rather than a worker thread. Under WSGI the
+    body stays a plain file iterator; an async one would be buffered whole by Django."""
+    stream = aiter_file_range if isinstance(request, ASGIRequest) else None
+    # The size/mtime lookups are blocking storage calls; keep them off the loop.
+    return await sync_to_async(serve_file, thread_sensitive=False)(request, field_file, stream=stream)
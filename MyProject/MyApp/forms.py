@@ -1,5 +1,5 @@
 from django import forms
-from django.contrib.auth.forms import AuthenticationForm
+from django.contrib.auth.forms import AdminUserCreationForm, AuthenticationForm, UserChangeForm
 from .models import User, StudentDetail, InstructorDetail, AdminDetail
 from .models import Profile, Achievement
 # Signup Form
@@ -20,6 +20,14 @@ class SignupForm(forms.ModelForm):
         if password != confirm_password:
             raise forms.ValidationError("Passwords do not match")
 
+    def save(self, commit=True):
+        # The ModelForm would store the raw password; hash it like create_user does.
+        user = super().save(commit=False)
+        user.set_password(self.cleaned_data['password'])
+        if commit:
+            user.save()
+        return user
+
 
 from .models import User
 
@@ -40,4 +48,23 @@ class ProfileForm(forms.ModelForm):
 class AchievementForm(forms.ModelForm):
     class Meta:
         model = Achievement
-        fields = ['record_type', 'course', 'title', 'description']
\ No newline at end of file
+        fields = ['record_type', 'course', 'title', 'description']
+
+
+class CourseBundleForm(forms.Form):
+    bundle = forms.FileField(help_text="ZIP with contents.csv/.jsonl, questions.csv/.jsonl and the files they reference.")
+    dry_run = forms.BooleanField(required=False, initial=True, label="Validate only (dry run)")
+
+
+# Admin forms for the custom User: the password is hashed on add and shown
+# read-only (with a change-password link) on edit.
+class UserAdminCreationForm(AdminUserCreationForm):
+    class Meta:
+        model = User
+        fields = ('email', 'full_name', 'role')
+
+
+class UserAdminChangeForm(UserChangeForm):
+    class Meta:
+        model = User
+        fields = '__all__'
@@ -0,0 +1,138 @@
+from array import array
+from bisect import bisect_left
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import LocalLRUCache, bump_version, get_version
+from .models import Enrollment, QuizAttempt, QuizQuestion
+
+
+class AnswerKey:
+    """Question id -> correct option for one course, kept in two parallel arrays.
+
+    Ids are sorted so lookups are a binary search; a 500-question course fits in a few
+    kilobytes instead of a dict of boxed ints.
+    """
+
+    __slots__ = ('question_ids', 'options')
+
+    def __init__(self, pairs):
+        pairs = sorted(pairs)
+        self.question_ids = array('q', [question_id for question_id, _ in pairs])
+        self.options = array('B', [option for _, option in pairs])
+
+    def __len__(self):
+        return len(self.question_ids)
+
+    def __contains__(self, question_id):
+        return self.get(question_id) is not None
+
+    def get(self, question_id):
+        index = bisect_left(self.question_ids, question_id)
+        if index < len(self.question_ids) and self.question_ids[index] == question_id:
+            return self.options[index]
+        return None
+
+    def __getstate__(self):
+        return self.question_ids.tobytes(), self.options.tobytes()
+
+    def __setstate__(self, state):
+        self.question_ids = array('q')
+        self.question_ids.frombytes(state[0])
+        self.options = array('B')
+        self.options.frombytes(state[1])
+
+
+_local_answer_keys = LocalLRUCache(settings.QUIZ_ANSWER_KEY_CACHE_SIZE, timeout=settings.QUIZ_ANSWER_KEY_TIMEOUT)
+
+
+def _answer_key_version_key(course_id):
+    return f'quiz:answer-key-version:{course_id}'
+
+
+def get_answer_key(course_id):
+    """Return the AnswerKey for a course: local LRU, then the shared cache, then the database."""
+    version = get_version(_answer_key_version_key(course_id))
+    cache_key = f'quiz:answer-key:{course_id}:{version}'
+    key = _local_answer_keys.get(cache_key)
+    if key is None:
+        key = cache.get(cache_key)
+        if key is None:
+            key = AnswerKey(QuizQuestion.objects.filter(course_id=course_id).values_list('pk', 'correct_option'))
+            cache.set(cache_key, key, timeout=settings.QUIZ_ANSWER_KEY_TIMEOUT)
+        _local_answer_keys.set(cache_key, key)
+    return key
+
+
+def invalidate_answer_key(course_id):
+    # With a shared cache (REDIS_URL) every worker sees the new version on its
+    # next lookup. On the per-process default cache only this worker does; the
+    # others pick up the change when QUIZ_ANSWER_KEY_TIMEOUT expires their copy.
+    # Call it after commit, or a concurrent grading can cache the old rows under
+    # the new version.
+    bump_version(_answer_key_version_key(course_id))
+
+
+def clear_local_answer_keys():
+    _local_answer_keys.clear()
+
+
+class GradeResult(NamedTuple):
+    correct: int
+    total: int
+    score: int
+
+
+def parse_answers(data):
+    """Pull ``question_<id>=<option>`` pairs out of a submitted form."""
+    answers = {}
+    for key, value in data.items():
+        if not key.startswith('question_'):
+            continue
+        try:
+            question_id, option = int(key[len('question_'):]), int(value)
+        except ValueError:
+            continue
+        if 1 <= option <= 4:
+            answers[question_id] = option
+    return answers
+
+
+def grade_submission(user, course, answers):
+    """Grade a whole quiz submission for ``course`` and record it.
+
+    ``answers`` maps question id to the selected option. The answer key comes from
+    get_answer_key(), every attempt is written with a single upsert on (user, question), and the
+    enrollment score is updated in the same transaction. Unanswered questions count as
+    wrong; ids that do not belong to the course are ignored.
+    """
+    key = get_answer_key(course.pk)
+    now = timezone.now()
+    attempts = [
+        QuizAttempt(
+            user=user,
+            course=course,
+            question_id=question_id,
+            selected_option=option,
+            is_correct=key.get(question_id) == option,
+            attempted_at=now,
+        )
+        for question_id, option in answers.items()
+        if question_id in key
+    ]
+    correct = sum(attempt.is_correct for attempt in attempts)
+    score = correct * 100 // len(key) if key else 0
+
+    with transaction.atomic():
+        QuizAttempt.objects.bulk_create(
+            attempts,
+            update_conflicts=True,
+            unique_fields=['user', 'question'],
+            update_fields=['selected_option', 'is_correct', 'attempted_at'],
+        )
+        Enrollment.objects.filter(user=user, course=course).update(score=score)
+    return GradeResult(correct, len(key), score)
@@ -0,0 +1,258 @@
+"""Bulk import of course content and quiz questions from a bundle.
+
+A bundle is a ZIP archive (or, from the command line, a directory) holding
+``contents.csv`` or ``contents.jsonl``, ``questions.csv`` or ``questions.jsonl``,
+and any files the content rows reference in their ``file`` column::
+
+    contents.csv     title,content_type,position,text_content,test_link,external_link,file
+    questions.jsonl  {"question_text": ..., "option_1": ..., ..., "option_4": ..., "correct_option": 2}
+    videos/intro.mp4
+
+Records are read one at a time in two passes: the first validates every row
+and collects errors; the second (skipped on a dry run) stores the attached files
+and ``bulk_create``s the rows in batches, all inside one transaction.
+"""
+import csv
+import io
+import json
+import os
+import time
+import zipfile
+from contextlib import contextmanager
+from itertools import islice
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import transaction
+
+from . import search
+from .caching import bump_catalog_version
+from .grading import invalidate_answer_key
+from .models import CourseContent, QuizQuestion
+
+CONTENT_FIELDS = {'title', 'content_type', 'position', 'text_content', 'test_link', 'external_link', 'file'}
+QUESTION_FIELDS = {'question_text', 'option_1', 'option_2', 'option_3', 'option_4', 'correct_option'}
+FILE_FIELDS = {'Video': 'video_file', 'PDF': 'pdf_file'}
+
+
+class BundleError(Exception):
+    """The bundle itself is unusable (not an archive, no manifest)."""
+
+
+class ImportReport(NamedTuple):
+    contents: int
+    questions: int
+    files: int
+    errors: list
+    timings: dict
+    dry_run: bool
+
+
+class Bundle:
+    """Read-only view of a ZIP archive or a directory."""
+
+    def __init__(self, source):
+        if isinstance(source, (str, os.PathLike)) and os.path.isdir(source):
+            self.root, self.archive = os.fspath(source), None
+        else:
+            try:
+                self.root, self.archive = None, zipfile.ZipFile(source)
+            except zipfile.BadZipFile as exc:
+                raise BundleError("The bundle is not a ZIP archive.") from exc
+
+    def exists(self, name):
+        if self.archive is not None:
+            try:
+                self.archive.getinfo(name)
+            except KeyError:
+                return False
+            return True
+        return os.path.isfile(self._path(name))
+
+    def open(self, name):
+        return self.archive.open(name) if self.archive is not None else open(self._path(name), 'rb')
+
+    def _path(self, name):
+        path = os.path.normpath(os.path.join(self.root, name))
+        if not path.startswith(os.path.join(os.path.normpath(self.root), '')):
+            raise BundleError(f"{name}: path escapes the bundle.")
+        return path
+
+    def records(self, stem):
+        """Yield dict rows from ``<stem>.csv`` or ``<stem>.jsonl``, one at a time."""
+        for extension in ('csv', 'jsonl'):
+            name = f'{stem}.{extension}'
+            if self.exists(name):
+                break
+        else:
+            return
+        with self.open(name) as raw:
+            text = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+            if extension == 'csv':
+                yield from csv.DictReader(text)
+            else:
+                for line in text:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
+
+
+def _build_content(course, record, position):
+    values = {key: value for key, value in record.items() if key != 'file' and value not in (None, '')}
+    values.setdefault('position', position)
+    content = CourseContent(course=course, **values)
+    content.full_clean(exclude=['course', 'video_file', 'pdf_file'])
+    return content
+
+
+def _build_question(course, record):
+    question = QuizQuestion(course=course, **record)
+    question.full_clean(exclude=['course'])
+    return question
+
+
+def _check_record(label, record, allowed):
+    if not isinstance(record, dict):
+        return [f"{label}: expected an object, got {type(record).__name__}"]
+    problems = []
+    if None in record:
+        # csv.DictReader files surplus fields under None, e.g. after an unquoted comma.
+        problems.append(f"{label}: too many fields")
+    unknown = set(record) - allowed - {None}
+    if unknown:
+        problems.append(f"{label}: unknown column(s) {', '.join(sorted(unknown))}")
+    return problems
+
+
+def validate(bundle, course):
+    """Validate every record without writing anything. Returns (contents, questions, files, errors)."""
+    errors = []
+    contents = questions = files = 0
+    try:
+        for index, record in enumerate(bundle.records('contents'), start=1):
+            label = f"contents row {index}"
+            problems = _check_record(label, record, CONTENT_FIELDS)
+            if not problems:
+                try:
+                    content = _build_content(course, record, index)
+                except (ValidationError, TypeError, ValueError) as exc:
+                    problems.append(f"{label}: {_describe(exc)}")
+                else:
+                    attachment = record.get('file')
+                    if attachment:
+                        if content.content_type not in FILE_FIELDS:
+                            problems.append(f"{label}: {content.content_type} content cannot have a file")
+                        elif not bundle.exists(attachment):
+                            problems.append(f"{label}: {attachment} is not in the bundle")
+                        else:
+                            files += 1
+            errors.extend(problems)
+            contents += 1
+
+        for index, record in enumerate(bundle.records('questions'), start=1):
+            label = f"questions row {index}"
+            problems = _check_record(label, record, QUESTION_FIELDS)
+            if not problems:
+                try:
+                    _build_question(course, record)
+                except (ValidationError, TypeError, ValueError) as exc:
+                    problems.append(f"{label}: {_describe(exc)}")
+            errors.extend(problems)
+            questions += 1
+    except (json.JSONDecodeError, UnicodeDecodeError, csv.Error) as exc:
+        errors.append(f"Unreadable manifest: {exc}")
+    if not contents and not questions and not errors:
+        raise BundleError("The bundle has no contents or questions file.")
+    return contents, questions, files, errors
+
+
+def _describe(exc):
+    if isinstance(exc, ValidationError) and hasattr(exc, 'message_dict'):
+        return '; '.join(f"{field}: {' '.join(messages)}" for field, messages in exc.message_dict.items())
+    return str(exc)
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _insert(bundle, course, batch_size, stored, timings):
+    content_ids = []
+    for batch in _batches(enumerate(bundle.records('contents'), start=1), batch_size):
+        rows = []
+        for index, record in batch:
+            content = _build_content(course, record, index)
+            attachment = record.get('file')
+            if attachment:
+                started = time.perf_counter()
+                field_file = getattr(content, FILE_FIELDS[content.content_type])
+                with bundle.open(attachment) as fh:
+                    field_file.save(os.path.basename(attachment), File(fh), save=False)
+                stored.append(field_file)
+                timings['store files'] += time.perf_counter() - started
+            rows.append(content)
+        started = time.perf_counter()
+        CourseContent.objects.bulk_create(rows)
+        timings['insert'] += time.perf_counter() - started
+        content_ids.extend(row.pk for row in rows if row.pk is not None)
+
+    for batch in _batches(bundle.records('questions'), batch_size):
+        rows = [_build_question(course, record) for record in batch]
+        started = time.perf_counter()
+        QuizQuestion.objects.bulk_create(rows)
+        timings['insert'] += time.perf_counter() - started
+    return content_ids
+
+
+@contextmanager
+def _stage(timings, name):
+    started = time.perf_counter()
+    yield
+    timings[name] += time.perf_counter() - started
+
+
+def import_bundle(source, course, dry_run=False, batch_size=None):
+    """Validate and (unless ``dry_run``) import a bundle into ``course``.
+
+    Nothing is written when any row is invalid. bulk_create sends no model signals,
+    so the catalog cache, the course's answer key and the search index are refreshed
+    here once the transaction has committed.
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    timings = {'validate': 0.0, 'store files': 0.0, 'insert': 0.0, 'invalidate': 0.0}
+    bundle = Bundle(source)
+    try:
+        with _stage(timings, 'validate'):
+            contents, questions, files, errors = validate(bundle, course)
+        if errors or dry_run:
+            return ImportReport(contents, questions, files, errors, timings, dry_run)
+
+        stored = []
+        try:
+            with transaction.atomic():
+                content_ids = _insert(bundle, course, batch_size, stored, timings)
+        except BaseException:
+            # The rows were rolled back; do not leave their files behind.
+            for field_file in stored:
+                field_file.storage.delete(field_file.name)
+            raise
+    finally:
+        bundle.close()
+
+    with _stage(timings, 'invalidate'):
+        bump_catalog_version()
+        if questions:
+            invalidate_answer_key(course.pk)
+        for ids in _batches(content_ids, batch_size):
+            search.index_documents([
+                search.content_document(content)
+                for content in CourseContent.objects.filter(pk__in=ids).only('course_id', 'title', 'text_content')
+            ])
+    return ImportReport(contents, questions, files, errors, timings, dry_run)
@@ -0,0 +1,50 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from MyApp.models import Profile, User
+from MyApp.thumbnails import render_variants
+
+
+class Command(BaseCommand):
+    help = "Generate missing profile picture thumbnails for existing users and profiles in parallel."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--force', action='store_true', help="Regenerate thumbnails that already exist.")
+
+    def handle(self, *args, **options):
+        for model in (User, Profile):
+            pending = self._pending(model, options['force'])
+            done = self._render(model, pending, options['workers'])
+            self.stdout.write(f"{model.__name__}: generated thumbnails for {done} of {len(pending)} picture(s).")
+
+    def _pending(self, model, force):
+        rows = (
+            model.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True)
+            .values_list('pk', 'profile_picture', 'profile_picture_variants')
+        )
+        return {
+            pk: name for pk, name, variants in rows.iterator(chunk_size=2000)
+            if force or (variants or {}).get('source') != name
+        }
+
+    def _render(self, model, pending, workers):
+        if not pending:
+            return 0
+        # Workers only touch storage; close DB connections so forked children don't share them.
+        connections.close_all()
+        updated = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(render_variants, name): pk for pk, name in pending.items()}
+            for future in as_completed(futures):
+                try:
+                    variants = future.result()
+                except Exception as exc:
+                    self.stderr.write(f"{model.__name__} {futures[future]}: {exc}")
+                    continue
+                updated.append(model(pk=futures[future], profile_picture_variants=variants))
+        model.objects.bulk_update(updated, ['profile_picture_variants'], batch_size=500)
+        return len(updated)
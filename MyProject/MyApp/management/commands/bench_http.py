@@ -0,0 +1,104 @@
+import statistics
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError
+
+from MyApp.models import User
+
+READ_SIZE = 64 * 1024
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # A redirect (e.g. to the login page) is reported as an error, not followed.
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Command(BaseCommand):
+    help = ("Load-test running servers with concurrent GETs and compare throughput and latency, "
+            "e.g. the same paths under a WSGI and an ASGI server.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='+', metavar='LABEL=URL',
+                            help="Servers to compare, e.g. wsgi=http://127.0.0.1:8000 asgi=http://127.0.0.1:8001")
+        parser.add_argument('--path', action='append', dest='paths',
+                            help="Path to request; repeat for several. Defaults to /courses/.")
+        parser.add_argument('--requests', type=int, default=500, help="Requests per target and path.")
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--user', help="Email of an existing user to sign the requests in as.")
+        parser.add_argument('--read-delay', type=float, default=0.0,
+                            help="Seconds to sleep between 64 KiB reads, to imitate slow clients.")
+        parser.add_argument('--timeout', type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options['targets']:
+            label, sep, url = target.partition('=')
+            if not sep or not url.startswith(('http://', 'https://')):
+                raise CommandError(f"Expected LABEL=URL, got {target!r}.")
+            targets.append((label, url.rstrip('/')))
+        headers = {}
+        if options['user']:
+            headers['Cookie'] = f"{settings.SESSION_COOKIE_NAME}={self._session_for(options['user'])}"
+
+        self.stdout.write(
+            f"{'target':<8} {'path':<24} {'requests':>8} {'errors':>6} {'req/s':>8} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        )
+        for label, base_url in targets:
+            for path in options['paths'] or ['/courses/']:
+                self._run(label, base_url + path, headers, options)
+
+    def _session_for(self, email):
+        # Same session keys as django.contrib.auth.login(); the servers must share
+        # this database (or, with SESSION_BACKEND=cache, this cache).
+        try:
+            user = User.objects.get(email=email)
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {email}.")
+        store = import_module(settings.SESSION_ENGINE).SessionStore()
+        store[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        store[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        store[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        store.save()
+        return store.session_key
+
+    def _run(self, label, url, headers, options):
+        opener = urllib.request.build_opener(_NoRedirect)
+
+        def fetch(_):
+            request = urllib.request.Request(url, headers=headers)
+            started = time.perf_counter()
+            try:
+                with opener.open(request, timeout=options['timeout']) as response:
+                    while response.read(READ_SIZE):
+                        if options['read_delay']:
+                            time.sleep(options['read_delay'])
+            except (urllib.error.URLError, OSError):
+                return None
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(pool.map(fetch, range(options['requests'])))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(result for result in results if result is not None)
+        errors = len(results) - len(latencies)
+        if len(latencies) >= 2:
+            cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+            p50, p95, p99 = (cuts[i - 1] * 1000 for i in (50, 95, 99))
+        else:
+            p50 = p95 = p99 = latencies[0] * 1000 if latencies else float('nan')
+        path = urllib.parse.urlsplit(url).path
+        self.stdout.write(
+            f"{label:<8} {path:<24} {len(results):>8} {errors:>6} {len(latencies) / elapsed:>8.1f} "
+            f"{p50:>8.1f} {p95:>8.1f} {p99:>8.1f}"
+        )
@@ -0,0 +1,55 @@
+import time
+
+from django.contrib.auth import login
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from MyApp.models import User
+
+
+def legacy_save_user_profile(sender, instance, **kwargs):
+    # The handler MyApp.signals used to run on every User save.
+    instance.profile.save()
+
+
+class Command(BaseCommand):
+    help = "Measure queries and time per login() with and without the legacy per-save Profile write."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def handle(self, *args, **options):
+        # Everything runs in a transaction that is rolled back, so the
+        # benchmark user and sessions never reach the real database.
+        with transaction.atomic():
+            user = User.objects.create_user('bench-login@example.com', 'Bench Login', None)
+            post_save.connect(legacy_save_user_profile, sender=User)
+            try:
+                before = self._measure(user, options['iterations'])
+            finally:
+                post_save.disconnect(legacy_save_user_profile, sender=User)
+            after = self._measure(user, options['iterations'])
+            transaction.set_rollback(True)
+
+        for label, (queries, elapsed) in (('before', before), ('after', after)):
+            self.stdout.write(f"{label:>6}: {queries} queries per login, {elapsed * 1000:.3f} ms per login")
+
+    def _measure(self, user, iterations):
+        factory = RequestFactory()
+        middleware = SessionMiddleware(lambda request: None)
+        queries = elapsed = 0
+        for _ in range(iterations):
+            # A fresh instance per login, as the auth backend would load it.
+            fresh = User.objects.get(pk=user.pk)
+            request = factory.post('/login/')
+            middleware.process_request(request)
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                login(request, fresh)
+                elapsed += time.perf_counter() - start
+            queries += len(captured)
+        return queries // iterations, elapsed / iterations
@@ -0,0 +1,89 @@
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from MyApp.sqlite_tuning import apply_pragmas
+
+SCHEMA = """
+CREATE TABLE enrollment (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    course_id INTEGER NOT NULL,
+    progress INTEGER NOT NULL DEFAULT 0,
+    enrolled_at TEXT NOT NULL,
+    UNIQUE (user_id, course_id)
+)
+"""
+
+
+def _worker(path, tuned, worker, enrollments, results):
+    # Mirrors enroll_course: a read of the learner's enrollments, then the INSERT,
+    # in one transaction, like the ORM does with Django's default settings.
+    connection = sqlite3.connect(path, timeout=5, isolation_level=None)
+    cursor = connection.cursor()
+    if tuned:
+        apply_pragmas(cursor, settings.SQLITE_PRAGMAS)
+    begin = 'BEGIN IMMEDIATE' if tuned else 'BEGIN'
+    done = locked = 0
+    for course in range(enrollments):
+        user = worker * enrollments + course
+        try:
+            cursor.execute(begin)
+            cursor.execute('SELECT COUNT(*) FROM enrollment WHERE user_id = ?', (user,))
+            cursor.execute(
+                "INSERT INTO enrollment (user_id, course_id, enrolled_at) VALUES (?, ?, datetime('now'))",
+                (user, course),
+            )
+            cursor.execute('COMMIT')
+            done += 1
+        except sqlite3.OperationalError as exc:
+            if 'locked' not in str(exc):
+                raise
+            locked += 1
+            if connection.in_transaction:
+                cursor.execute('ROLLBACK')
+    connection.close()
+    results.put((done, locked))
+
+
+class Command(BaseCommand):
+    help = "Compare concurrent enrollment writes on default SQLite against SQLITE_PRAGMAS + IMMEDIATE transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--enrollments', type=int, default=500, help="Enrollments written per worker.")
+
+    def handle(self, *args, **options):
+        for label, tuned in (('default', False), ('tuned', True)):
+            done, locked, elapsed = self._run(tuned, options['workers'], options['enrollments'])
+            self.stdout.write(
+                f"{label:>7}: {done} enrollments in {elapsed:.2f}s ({done / elapsed:.0f}/s), "
+                f"{locked} 'database is locked' error(s)"
+            )
+
+    def _run(self, tuned, workers, enrollments):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.sqlite3')
+            with sqlite3.connect(path) as connection:
+                connection.execute(SCHEMA)
+                if tuned:
+                    apply_pragmas(connection.cursor(), settings.SQLITE_PRAGMAS)
+
+            results = multiprocessing.Queue()
+            processes = [
+                multiprocessing.Process(target=_worker, args=(path, tuned, worker, enrollments, results))
+                for worker in range(workers)
+            ]
+            start = time.perf_counter()
+            for process in processes:
+                process.start()
+            totals = [results.get() for _ in processes]
+            for process in processes:
+                process.join()
+            elapsed = time.perf_counter() - start
+        return sum(done for done, _ in totals), sum(locked for _, locked in totals), elapsed
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from MyApp.templatetags.course_images import MANIFEST_NAME, load_manifest
+
+
+class Command(BaseCommand):
+    help = "Resize, recompress and content-hash course artwork into WebP plus PNG/JPEG fallbacks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default=os.path.join(settings.BASE_DIR, 'MyApp', 'static'))
+        parser.add_argument('--output', default=settings.COURSE_IMAGE_BUILD_DIR)
+
+    def handle(self, *args, **options):
+        source = Path(options['source'])
+        output = Path(options['output'])
+        images_dir = output / Path(MANIFEST_NAME).parent
+        images_dir.mkdir(parents=True, exist_ok=True)
+
+        manifest = {}
+        before = after = 0
+        for path in sorted((source / 'images').glob('*')):
+            if path.suffix.lower() not in ('.png', '.jpg', '.jpeg'):
+                continue
+            key = path.relative_to(source).as_posix()
+            entry, written = self._build(path, images_dir)
+            manifest[key] = entry
+            before += path.stat().st_size
+            after += written
+
+        current = {Path(name).name for entry in manifest.values() for variants in entry.values() for name in variants.values()}
+        for stale in images_dir.iterdir():
+            if stale.name not in current and stale.name != Path(MANIFEST_NAME).name:
+                stale.unlink()
+        (output / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True))
+        load_manifest.cache_clear()
+        self.stdout.write(self.style.SUCCESS(
+            f"Built {len(manifest)} image(s): {before // 1024} KB of originals, "
+            f"{after // 1024} KB of variants (every width and format)."
+        ))
+
+    def _build(self, path, images_dir):
+        image = Image.open(path)
+        has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+        fallback = ('PNG', 'png') if has_alpha else ('JPEG', 'jpg')
+        prefix = Path(MANIFEST_NAME).parent.as_posix()
+
+        entry = {'webp': {}, 'fallback': {}}
+        written = 0
+        # Never upscale: widths past the original collapse into one variant.
+        for width in sorted({min(width, image.width) for width in settings.COURSE_IMAGE_WIDTHS}):
+            resized = image
+            if image.width > width:
+                height = round(image.height * width / image.width)
+                resized = image.resize((width, height), Image.Resampling.LANCZOS)
+            for kind, (fmt, ext) in (('webp', ('WEBP', 'webp')), ('fallback', fallback)):
+                data = self._encode(resized, fmt)
+                digest = hashlib.sha256(data).hexdigest()[:12]
+                name = f'{path.stem}.{width}w.{digest}.{ext}'
+                (images_dir / name).write_bytes(data)
+                entry[kind][str(width)] = f'{prefix}/{name}'
+                written += len(data)
+        return entry, written
+
+    def _encode(self, image, fmt):
+        buffer = BytesIO()
+        if fmt == 'WEBP':
+            image.save(buffer, fmt, quality=settings.COURSE_IMAGE_QUALITY, method=6)
+        elif fmt == 'JPEG':
+            image.save(buffer, fmt, quality=settings.COURSE_IMAGE_QUALITY, optimize=True, progressive=True)
+        else:
+            image.save(buffer, fmt, optimize=True)
+        return buffer.getvalue()
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from MyApp.models import Course, Enrollment, User
+
+
+class Command(BaseCommand):
+    help = "Enroll a cohort of users into a course using batched inserts that skip existing enrollments."
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_id', type=int)
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument('--emails', help="Path to a file with one user email per line.")
+        source.add_argument('--role', choices=[role for role, _ in User.ROLE_CHOICES],
+                            help="Enroll every active user with this role.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            course = Course.objects.get(pk=options['course_id'])
+        except Course.DoesNotExist:
+            raise CommandError(f"Course {options['course_id']} does not exist.")
+
+        batch_size = options['batch_size']
+        if options['emails']:
+            user_ids = self._user_ids_from_file(options['emails'], batch_size)
+        else:
+            user_ids = (
+                User.objects.filter(role=options['role'], is_active=True)
+                .values_list('pk', flat=True)
+                .iterator(chunk_size=batch_size)
+            )
+
+        created = Enrollment.objects.bulk_enroll(course, user_ids, batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Enrolled {created} new user(s) in {course.title}."))
+
+    def _user_ids_from_file(self, path, batch_size):
+        # Resolve emails a batch at a time so the file is never fully in memory.
+        with open(path) as handle:
+            batch = []
+            for line in handle:
+                email = line.strip()
+                if email:
+                    batch.append(User.objects.normalize_email(email))
+                if len(batch) >= batch_size:
+                    yield from User.objects.filter(email__in=batch).values_list('pk', flat=True)
+                    batch = []
+            if batch:
+                yield from User.objects.filter(email__in=batch).values_list('pk', flat=True)
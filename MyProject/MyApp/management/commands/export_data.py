@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from MyApp.exports import DATASETS, FORMATS, encode, export_rows, parse_moment
+
+
+class Command(BaseCommand):
+    help = "Stream enrollments, quiz attempts or achievements as CSV or JSONL without loading them into memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(DATASETS))
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--course', type=int, help="Only rows for this course id.")
+        parser.add_argument('--since', help="ISO date or datetime, inclusive.")
+        parser.add_argument('--until', help="ISO date or datetime, inclusive.")
+        parser.add_argument('--output', help="File to write; defaults to stdout.")
+        parser.add_argument('--chunk-size', type=int, help="Rows fetched per round trip.")
+
+    def handle(self, *args, **options):
+        try:
+            since = parse_moment(options['since'])
+            until = parse_moment(options['until'], end_of_day=True)
+        except ValueError as exc:
+            raise CommandError(exc)
+        columns, rows = export_rows(
+            options['dataset'], course=options['course'], since=since, until=until,
+            chunk_size=options['chunk_size'],
+        )
+        lines = encode(options['format'], columns, rows)
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as out:
+                count = 0
+                for line in lines:
+                    out.write(line)
+                    count += 1
+            self.stderr.write(self.style.SUCCESS(f"Wrote {count} line(s) to {options['output']}."))
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from MyApp.imports import BundleError, import_bundle
+from MyApp.models import Course
+
+
+class Command(BaseCommand):
+    help = "Import course contents, quiz questions and their files from a bundle (ZIP or directory)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('bundle', help="Path to a .zip bundle or a directory laid out the same way.")
+        parser.add_argument('--course', type=int, required=True, help="Id of the course to import into.")
+        parser.add_argument('--dry-run', action='store_true', help="Validate only; write nothing.")
+        parser.add_argument('--batch-size', type=int, help="Rows per bulk_create batch.")
+
+    def handle(self, *args, **options):
+        try:
+            course = Course.objects.get(pk=options['course'])
+        except Course.DoesNotExist:
+            raise CommandError(f"Course {options['course']} does not exist.")
+        try:
+            report = import_bundle(options['bundle'], course, dry_run=options['dry_run'],
+                                   batch_size=options['batch_size'])
+        except (BundleError, OSError) as exc:
+            raise CommandError(exc)
+
+        for error in report.errors:
+            self.stderr.write(error)
+        for stage, seconds in report.timings.items():
+            self.stdout.write(f"{stage:>12}: {seconds * 1000:.1f} ms")
+        summary = f"{report.contents} content item(s), {report.questions} question(s), {report.files} file(s)"
+        if report.errors:
+            raise CommandError(f"{len(report.errors)} invalid row(s); nothing was imported.")
+        if report.dry_run:
+            self.stdout.write(self.style.SUCCESS(f"Dry run: {summary} would be imported into {course.title}."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Imported {summary} into {course.title}."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from MyApp import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the course and content full-text search index from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Rows read and indexed per batch.")
+
+    def handle(self, *args, **options):
+        total = search.rebuild(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} document(s)."))
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from MyApp.models import Course, CourseContent, CourseProgress, Enrollment
+
+
+class Command(BaseCommand):
+    help = "Recompute Enrollment progress counters from CourseProgress and fix any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help="Courses per aggregate query.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        course_ids = list(Course.objects.order_by('pk').values_list('pk', flat=True))
+        fixed = 0
+        for start in range(0, len(course_ids), batch_size):
+            fixed += self._reconcile(course_ids[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {fixed} enrollment(s) across {len(course_ids)} course(s)."))
+
+    def _reconcile(self, course_ids):
+        totals = dict(
+            CourseContent.objects.filter(course_id__in=course_ids)
+            .values_list('course_id').annotate(total=Count('pk')).order_by()
+        )
+        completed = {
+            (row['user_id'], row['content__course_id']): row['done']
+            for row in CourseProgress.objects.filter(completed=True, content__course_id__in=course_ids)
+            .values('user_id', 'content__course_id').annotate(done=Count('pk')).order_by()
+        }
+
+        now = timezone.now()
+        drifted = []
+        for enrollment in Enrollment.objects.filter(course_id__in=course_ids).only(
+            'user_id', 'course_id', 'progress', 'completed_contents', 'completed_at'
+        ).iterator(chunk_size=2000):
+            done = completed.get((enrollment.user_id, enrollment.course_id), 0)
+            total = totals.get(enrollment.course_id, 0)
+            progress = min(100, done * 100 // total) if total else 0
+            completed_at = enrollment.completed_at or (now if total and done >= total else None)
+            if (done, progress, completed_at) != (enrollment.completed_contents, enrollment.progress, enrollment.completed_at):
+                enrollment.completed_contents = done
+                enrollment.progress = progress
+                enrollment.completed_at = completed_at
+                drifted.append(enrollment)
+
+        with transaction.atomic():
+            Enrollment.objects.bulk_update(drifted, ['completed_contents', 'progress', 'completed_at'], batch_size=1000)
+        return len(drifted)
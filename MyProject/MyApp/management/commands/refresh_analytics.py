@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from MyApp.analytics import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = "Refresh the instructor analytics rollups from enrollments and quiz attempts since the last run."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help="Re-aggregate everything instead of only changes since the watermark.")
+
+    def handle(self, *args, **options):
+        result = refresh_rollups(full=options['full'])
+        scope = "full" if result.full else "incremental"
+        self.stdout.write(self.style.SUCCESS(
+            f"Refreshed {result.courses} course(s) and {result.questions} question(s) ({scope})."
+        ))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = "Refresh SQLite query planner statistics and checkpoint the WAL."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError(f"{options['database']} is not a SQLite database.")
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            cursor.execute('PRAGMA optimize')
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+            if journal_mode == 'wal':
+                cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                busy, log_frames, checkpointed = cursor.fetchone()
+                self.stdout.write(f"Checkpointed {checkpointed} of {log_frames} WAL frame(s){' (busy)' if busy else ''}.")
+        self.stdout.write(self.style.SUCCESS(f"ANALYZE and optimize done (journal_mode={journal_mode})."))
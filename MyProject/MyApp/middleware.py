@@ -0,0 +1,60 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .routers import use_replica, wrote_to_primary
+
+PIN_COOKIE = 'primary_pin'
+
+
+class ReadReplicaMiddleware:
+    """Route GET/HEAD requests for READ_REPLICA_VIEWS to the replica database.
+
+    A client that has just written (for example enrolled and was redirected to My
+    Courses) carries a short-lived cookie that keeps its reads on the primary.
+
+    Works in both modes, so under ASGI the async views are not pushed back onto
+    a worker thread by this middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        replica_token = use_replica.set(False)
+        wrote_token = wrote_to_primary.set(False)
+        try:
+            response = self.get_response(request)
+            self._pin_if_written(response)
+        finally:
+            use_replica.reset(replica_token)
+            wrote_to_primary.reset(wrote_token)
+        return response
+
+    async def __acall__(self, request):
+        replica_token = use_replica.set(False)
+        wrote_token = wrote_to_primary.set(False)
+        try:
+            response = await self.get_response(request)
+            self._pin_if_written(response)
+        finally:
+            use_replica.reset(replica_token)
+            wrote_to_primary.reset(wrote_token)
+        return response
+
+    def _pin_if_written(self, response):
+        if wrote_to_primary.get():
+            response.set_cookie(PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax')
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        use_replica.set(
+            request.method in ('GET', 'HEAD')
+            and PIN_COOKIE not in request.COOKIES
+            and request.resolver_match.url_name in settings.READ_REPLICA_VIEWS
+        )
+        return None
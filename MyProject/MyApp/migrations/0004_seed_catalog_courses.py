@@ -0,0 +1,42 @@
+from django.db import migrations
+
+
+# The ten courses that used to be hard-coded in courses.html.
+CATALOG = [
+    ('Data Structure and Algorithm', 'Learn Data Structure and Algorithms.', 'images/dsa.png'),
+    ('Python Programming', 'Learn Python from scratch and build powerful applications.', 'images/python.png'),
+    ('Full-Stack Web Development', 'Master HTML, CSS, JavaScript, React, and Django.', 'images/javascript.png'),
+    ('Data Analytics', 'Analyze and visualize data using Python, Pandas & Excel.', 'images/dataanalytics.png'),
+    ('Machine Learning', 'Build ML models and understand AI concepts with projects.', 'images/ml.png'),
+    ('Cyber Security', 'Learn ethical hacking, security practices, and protection.', 'images/cyber.png'),
+    ('Cloud Computing', 'Explore AWS, Azure, and cloud technologies for deployment.', 'images/cloud.png'),
+    ('Java Programming', 'Master Java and object-oriented programming concepts.', 'images/java.png'),
+    ('Mobile App Development', 'Build Android and iOS apps using Flutter and React Native.', 'images/mobile.png'),
+    ('UI/UX Design', 'Design beautiful interfaces and user experiences.', 'images/uiux.png'),
+]
+
+
+def seed_courses(apps, schema_editor):
+    Course = apps.get_model('MyApp', 'Course')
+    existing = set(Course.objects.values_list('title', flat=True))
+    Course.objects.bulk_create([
+        Course(title=title, description=description, image_url=image_url)
+        for title, description, image_url in CATALOG
+        if title not in existing
+    ])
+
+
+def unseed_courses(apps, schema_editor):
+    Course = apps.get_model('MyApp', 'Course')
+    Course.objects.filter(title__in=[title for title, _, _ in CATALOG], created_by__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MyApp', '0003_achievement_record_type'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_courses, unseed_courses),
+    ]
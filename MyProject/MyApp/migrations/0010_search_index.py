@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:40
+
+from django.db import migrations
+
+TABLE = 'myapp_search'
+
+CREATE_SQL = {
+    'sqlite': [
+        f"CREATE VIRTUAL TABLE {TABLE} USING fts5("
+        "title, body, kind UNINDEXED, object_id UNINDEXED, course_id UNINDEXED, "
+        "tokenize = 'porter unicode61')",
+    ],
+    'postgresql': [
+        f"CREATE TABLE {TABLE} ("
+        "kind varchar(10) NOT NULL, object_id bigint NOT NULL, course_id bigint NOT NULL, "
+        "title text NOT NULL, body text NOT NULL, "
+        "document tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', title), 'A') || setweight(to_tsvector('english', body), 'B')"
+        ") STORED, PRIMARY KEY (kind, object_id))",
+        f"CREATE INDEX {TABLE}_document_idx ON {TABLE} USING gin (document)",
+    ],
+}
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = CREATE_SQL.get(vendor)
+    if not statements:
+        return
+    course = apps.get_model('MyApp', 'Course')._meta.db_table
+    content = apps.get_model('MyApp', 'CourseContent')._meta.db_table
+    for statement in statements:
+        schema_editor.execute(statement)
+    if vendor == 'sqlite':
+        # FTS5 columns have no index, so documents are keyed by rowid instead (see
+        # MyApp.search.document_rowid): object_id * 2, plus 1 for content items.
+        columns, course_key, content_key = 'rowid, kind, object_id', 'id * 2, ', 'id * 2 + 1, '
+    else:
+        columns, course_key, content_key = 'kind, object_id', '', ''
+    schema_editor.execute(
+        f"INSERT INTO {TABLE} ({columns}, course_id, title, body) "
+        f"SELECT {course_key}'course', id, id, title, COALESCE(description, '') FROM \"{course}\""
+    )
+    schema_editor.execute(
+        f"INSERT INTO {TABLE} ({columns}, course_id, title, body) "
+        f"SELECT {content_key}'content', id, course_id, title, COALESCE(text_content, '') FROM \"{content}\""
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE_SQL:
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MyApp', '0009_instructor_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -1,6 +1,13 @@
-from django.db import models
+from itertools import islice
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, Count, Exists, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Least, NullIf
+from django.db.models.lookups import GreaterThanOrEqual
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin, Group, Permission
 from django.conf import settings
+from django.templatetags.static import static
 
 # -----------------------------
 # Custom User Manager
@@ -20,11 +27,38 @@ class UserManager(BaseUserManager):
         extra_fields.setdefault('is_superuser', True)
         return self.create_user(email, full_name, password, role='Admin', **extra_fields)
 
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create skips post_save, so create the matching Profiles here in one batch.
+        users = super().bulk_create(objs, *args, **kwargs)
+        missing = (
+            self.filter(email__in=[user.email for user in users], profile__isnull=True)
+            .values_list('pk', flat=True)
+        )
+        Profile.objects.bulk_create(
+            [Profile(user_id=user_id) for user_id in missing],
+            batch_size=kwargs.get('batch_size'),
+            ignore_conflicts=True,
+        )
+        return users
+
+
+# -----------------------------
+# Profile picture thumbnails
+# -----------------------------
+class ThumbnailMixin:
+    """For models with ``profile_picture`` and ``profile_picture_variants`` (see MyApp.thumbnails)."""
+
+    def thumbnail_url(self, size):
+        name = (self.profile_picture_variants or {}).get(str(size))
+        if name:
+            return self.profile_picture.storage.url(name)
+        return self.profile_picture.url
+
 
 # -----------------------------
 # User Model
 # -----------------------------
-class User(AbstractBaseUser, PermissionsMixin):
+class User(ThumbnailMixin, AbstractBaseUser, PermissionsMixin):
     ROLE_CHOICES = [
         ('Student', 'Student'),
         ('Instructor', 'Instructor'),
@@ -48,6 +82,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     # Override groups and user_permissions to avoid conflicts
     groups = models.ManyToManyField(
@@ -110,6 +145,26 @@ class AdminDetail(models.Model):
 # -----------------------------
 # Courses
 # -----------------------------
+def _related_count(model, field='course', outer='pk'):
+    # Correlated COUNT subquery; unlike two Count() joins it does not multiply
+    # enrollments by contents for every course row.
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef(outer)})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    ), 0)
+
+
+class CourseQuerySet(models.QuerySet):
+    def with_catalog_stats(self):
+        return self.annotate(
+            enrollment_count=_related_count(Enrollment),
+            content_count=_related_count(CourseContent),
+        )
+
+
 class Course(models.Model):
     title = models.CharField(max_length=100)
     description = models.TextField()
@@ -118,26 +173,125 @@ class Course(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CourseQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Catalog ordering (newest first).
+            models.Index(fields=['-created_at', 'id'], name='course_created_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
+    @property
+    def image_src(self):
+        # image_url holds either a static path (images/python.png) or a full URL.
+        if self.image_url.startswith(('http://', 'https://', '/')):
+            return self.image_url
+        return static(self.image_url) if self.image_url else ''
+
 
 # -----------------------------
 # Enrollment
 # -----------------------------
+class EnrollmentQuerySet(models.QuerySet):
+    def bulk_enroll(self, course, user_ids, batch_size=1000):
+        """Enroll many users into ``course`` with batched INSERT ... ON CONFLICT DO NOTHING.
+
+        ``user_ids`` may be any iterable (including a lazy ``iterator()``); users who are
+        already enrolled are skipped by the unique (user, course) constraint. Returns the
+        number of new enrollments.
+        """
+        course_id = getattr(course, 'pk', course)
+        before = self.filter(course_id=course_id).count()
+        user_ids = iter(user_ids)
+        while batch := list(islice(user_ids, batch_size)):
+            self.bulk_create(
+                [self.model(user_id=user_id, course_id=course_id) for user_id in batch],
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+        return self.filter(course_id=course_id).count() - before
+
+    def record_completion(self):
+        """Count one more completed content item and recompute progress in a single UPDATE.
+
+        The course size comes from a correlated COUNT on the indexed course FK, so the
+        per-user CourseProgress rows are never recounted here.
+        """
+        completed = F('completed_contents') + 1
+        total = _related_count(CourseContent, outer='course')
+        return self.update(
+            completed_contents=completed,
+            progress=Least(Value(100), Coalesce(completed * 100 / NullIf(total, 0), Value(0))),
+            completed_at=Case(
+                When(completed_at__isnull=False, then=F('completed_at')),
+                When(GreaterThanOrEqual(completed, total), then=Value(timezone.now())),
+                default=None,
+            ),
+        )
+
+    def with_next_content(self):
+        """Annotate ``next_content_id``/``next_content_title``: the lowest-positioned
+        content of the course the enrolled user has not completed yet (None when done).
+        """
+        pending = CourseContent.objects.filter(course=OuterRef('course')).exclude(
+            Exists(CourseProgress.objects.filter(
+                content=OuterRef('pk'), user=OuterRef(OuterRef('user')), completed=True,
+            ))
+        ).order_by('position', 'pk')
+        return self.annotate(
+            next_content_id=Subquery(pending.values('pk')[:1]),
+            next_content_title=Subquery(pending.values('title')[:1]),
+        )
+
+    async def akeyset_page(self, after=None, size=20):
+        """Newest-first page of at most ``size`` rows that sort after the
+        ``(enrolled_at, id)`` key ``after``, plus the key to continue from (None on
+        the last page). Seeks through the index instead of counting an OFFSET.
+        """
+        rows = self.order_by('-enrolled_at', '-id')
+        if after is not None:
+            enrolled_at, pk = after
+            rows = rows.filter(Q(enrolled_at__lt=enrolled_at) | Q(enrolled_at=enrolled_at, id__lt=pk))
+        rows = [row async for row in rows[:size + 1]]
+        if len(rows) <= size:
+            return rows, None
+        rows = rows[:size]
+        return rows, (rows[-1].enrolled_at, rows[-1].pk)
+
+
 class Enrollment(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='enrollments')
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='enrollments')
     progress = models.IntegerField(default=0)  # 0-100
+    completed_contents = models.PositiveIntegerField(default=0)
     enrolled_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(blank=True, null=True)
     score = models.IntegerField(default=0)
+
+    objects = EnrollmentQuerySet.as_manager()
+
     class Meta:
         unique_together = ('user', 'course')
+        indexes = [
+            # Completed-course lists on the profile dashboard.
+            models.Index(fields=['user', 'completed_at'], name='enrollment_user_completed_idx'),
+            # Keyset pagination of My Courses.
+            models.Index(fields=['user', '-enrolled_at', '-id'], name='enrollment_user_enrolled_idx'),
+            # Changes since the analytics watermark (MyApp.analytics).
+            models.Index(fields=['enrolled_at'], name='enrollment_enrolled_idx'),
+            models.Index(fields=['completed_at'], name='enrollment_completed_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.full_name} - {self.course.title}"
 
+    @property
+    def is_completed(self):
+        return self.completed_at is not None
+
 
 # -----------------------------
 # Security Questions
@@ -175,6 +329,9 @@ class CourseContent(models.Model):
 
     class Meta:
         ordering = ['position']
+        indexes = [
+            models.Index(fields=['course', 'position'], name='content_course_position_idx'),
+        ]
 
     def __str__(self):
         return f"{self.course.title} - {self.title}"
@@ -201,16 +358,41 @@ class QuizQuestion(models.Model):
     def __str__(self):
         return f"{self.course.title} - {self.question_text[:50]}"
 
+    @property
+    def options(self):
+        return [self.option_1, self.option_2, self.option_3, self.option_4]
+
 
 # -----------------------------
 # Track Student Progress per Content
 # -----------------------------
+class CourseProgressQuerySet(models.QuerySet):
+    def complete(self, user, content):
+        """Mark ``content`` completed for ``user`` and bump their enrollment's progress.
+
+        Returns False when the item was already completed, in which case nothing changes.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            marked = self.filter(user=user, content=content, completed=False).update(completed=True, completed_at=now)
+            if not marked:
+                try:
+                    with transaction.atomic():
+                        self.create(user=user, content=content, completed=True, completed_at=now)
+                except IntegrityError:
+                    return False
+            Enrollment.objects.filter(user=user, course_id=content.course_id).record_completion()
+        return True
+
+
 class CourseProgress(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='course_progress')
     content = models.ForeignKey(CourseContent, on_delete=models.CASCADE, related_name='progress')
     completed = models.BooleanField(default=False)
     completed_at = models.DateTimeField(blank=True, null=True)
 
+    objects = CourseProgressQuerySet.as_manager()
+
     class Meta:
         unique_together = ('user', 'content')
 
@@ -236,6 +418,12 @@ class QuizAttempt(models.Model):
 
     class Meta:
         unique_together = ('user', 'question')
+        indexes = [
+            # Grading summaries per course and learner.
+            models.Index(fields=['course', 'user'], name='attempt_course_user_idx'),
+            # Changes since the analytics watermark (MyApp.analytics).
+            models.Index(fields=['attempted_at'], name='attempt_attempted_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.full_name} - {self.question.question_text[:30]} - {'Correct' if self.is_correct else 'Wrong'}"
@@ -262,19 +450,68 @@ class Achievement(models.Model):
     description = models.TextField(blank=True, null=True)
     date_awarded = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Newest-first achievement feed on the profile page.
+            models.Index(fields=['user', '-date_awarded'], name='achievement_user_awarded_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.full_name} - {self.record_type.capitalize()} - {self.title}"
 
 
-class Profile(models.Model):
+class Profile(ThumbnailMixin, models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     phone_number = models.CharField(max_length=15, blank=True, null=True)
     profile_picture = models.ImageField(upload_to="profile_pics/", blank=True, null=True)
+    profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False)
     bio = models.TextField(blank=True, null=True)
 
     def __str__(self):
         return self.user.username
-    
+
+
+# -----------------------------
+# Instructor Analytics Rollups
+# -----------------------------
+# Written only by MyApp.analytics.refresh_rollups(); dashboards read these
+# instead of aggregating Enrollment and QuizAttempt per request.
+class CourseStats(models.Model):
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    enrollment_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    average_score = models.FloatField(default=0)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.course.title} stats"
+
+    @property
+    def completion_rate(self):
+        return self.completed_count * 100 / self.enrollment_count if self.enrollment_count else 0
+
+
+class QuestionStats(models.Model):
+    question = models.OneToOneField(QuizQuestion, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='question_stats')
+    attempt_count = models.PositiveIntegerField(default=0)
+    correct_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.question} stats"
+
+    @property
+    def correct_rate(self):
+        return self.correct_count * 100 / self.attempt_count if self.attempt_count else 0
+
+
+class RollupWatermark(models.Model):
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} @ {self.value:%Y-%m-%d %H:%M:%S}"
+
 # -----------------------------------
 # Table Structure in Comments
 # -----------------------------------
@@ -361,4 +598,21 @@ QuizAttempt
 - selected_option
 - is_correct
 - attempted_at
+
+CourseStats (rollup)
+- course_id (PK, FK -> Course.id)
+- enrollment_count
+- completed_count
+- average_score
+- refreshed_at
+
+QuestionStats (rollup)
+- question_id (PK, FK -> QuizQuestion.id)
+- course_id (FK -> Course.id)
+- attempt_count
+- correct_count
+
+RollupWatermark
+- name (PK)
+- value
 """
@@ -0,0 +1,73 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+
+def encode_cursor(key):
+    """Opaque, URL-safe token for a keyset ``(datetime, id)`` position."""
+    moment, pk = key
+    raw = f"{moment.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Inverse of :func:`encode_cursor`; returns None for a missing or malformed token."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        moment, pk = raw.split('|')
+        return datetime.fromisoformat(moment), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def estimated_row_count(model, using):
+    """Planner statistics row count for ``model``'s table, or None when there are none.
+
+    PostgreSQL keeps it in pg_class.reltuples; SQLite in sqlite_stat1 once ANALYZE has
+    run (``manage.py sqlite_maintenance``).
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                               [connection.ops.quote_name(table)])
+            elif connection.vendor == 'sqlite':
+                cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+            else:
+                return None
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    # reltuples is -1 for a table that has never been vacuumed or analyzed.
+    return estimate if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Admin paginator that never runs COUNT(*) over a whole large table.
+
+    An unfiltered changelist uses the planner's row estimate once it exceeds
+    ADMIN_COUNT_LIMIT; a filtered or searched one counts at most ADMIN_COUNT_LIMIT
+    rows, so pages past that limit are not offered.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        limit = settings.ADMIN_COUNT_LIMIT
+        if not queryset.query.has_filters():
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > limit:
+                return estimate
+        return queryset.order_by()[:limit].count()
@@ -0,0 +1,32 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+
+REPLICA_ALIAS = 'replica'
+
+# Set by MyApp.middleware.ReadReplicaMiddleware for requests that may read from
+# the replica; any write during the request flips it back to the primary.
+use_replica = ContextVar('use_replica', default=False)
+wrote_to_primary = ContextVar('wrote_to_primary', default=False)
+
+
+class ReplicaRouter:
+    """Send reads from whitelisted read-only views to the replica; everything else uses default."""
+
+    def db_for_read(self, model, **hints):
+        if use_replica.get() and REPLICA_ALIAS in settings.DATABASES:
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Read-after-write: once this request has written, later reads see it on the primary.
+        use_replica.set(False)
+        wrote_to_primary.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db != REPLICA_ALIAS
@@ -0,0 +1,149 @@
+"""Full-text search over courses and course content.
+
+Documents live in one ``myapp_search`` table created by migration 0010: an FTS5
+virtual table on SQLite, or a table with a generated ``tsvector`` column and a GIN
+index on PostgreSQL. FTS5 columns cannot be indexed, so on SQLite each document is
+stored at a rowid derived from its kind and id (document_rowid) and replaced or
+removed by rowid. Signals in MyApp.signals keep it current row by row;
+``manage.py rebuild_search_index`` repopulates it from scratch.
+"""
+import re
+from typing import NamedTuple
+
+from django.db import connections, router, transaction
+
+from .models import Course, CourseContent
+
+TABLE = 'myapp_search'
+COURSE = 'course'
+CONTENT = 'content'
+
+# Title matches outrank body matches.
+SQLITE_SEARCH_SQL = f"""
+    SELECT kind, object_id, course_id, title, bm25({TABLE}, 10.0, 1.0) AS rank
+    FROM {TABLE} WHERE {TABLE} MATCH %s ORDER BY rank LIMIT %s
+"""
+POSTGRES_SEARCH_SQL = f"""
+    SELECT kind, object_id, course_id, title, ts_rank(document, query) AS rank
+    FROM {TABLE}, websearch_to_tsquery('english', %s) AS query
+    WHERE document @@ query ORDER BY rank DESC LIMIT %s
+"""
+
+WORD_RE = re.compile(r'\w+')
+
+# Kind -> rowid slot; migration 0010 computes the same rowids in SQL.
+KIND_SLOTS = {COURSE: 0, CONTENT: 1}
+
+
+class SearchHit(NamedTuple):
+    kind: str
+    object_id: int
+    course_id: int
+    title: str
+    rank: float
+
+
+def is_supported(connection):
+    return connection.vendor in ('sqlite', 'postgresql')
+
+
+def course_document(course):
+    return (COURSE, course.pk, course.pk, course.title, course.description or '')
+
+
+def content_document(content):
+    return (CONTENT, content.pk, content.course_id, content.title, content.text_content or '')
+
+
+def document_rowid(kind, object_id):
+    return object_id * len(KIND_SLOTS) + KIND_SLOTS[kind]
+
+
+def _write_connection():
+    return connections[router.db_for_write(Course)]
+
+
+def index_documents(documents, replace=True):
+    """Insert or (with ``replace``) replace ``(kind, object_id, course_id, title, body)`` documents."""
+    connection = _write_connection()
+    if not is_supported(connection) or not documents:
+        return
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            rows = [(document_rowid(kind, object_id), kind, object_id, *rest) for kind, object_id, *rest in documents]
+            if replace:
+                cursor.executemany(f"DELETE FROM {TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+            cursor.executemany(
+                f"INSERT INTO {TABLE} (rowid, kind, object_id, course_id, title, body) VALUES (%s, %s, %s, %s, %s, %s)",
+                rows,
+            )
+            return
+        if replace:
+            cursor.executemany(
+                f"DELETE FROM {TABLE} WHERE kind = %s AND object_id = %s",
+                [(kind, object_id) for kind, object_id, *_ in documents],
+            )
+        cursor.executemany(
+            f"INSERT INTO {TABLE} (kind, object_id, course_id, title, body) VALUES (%s, %s, %s, %s, %s)",
+            documents,
+        )
+
+
+def remove_document(kind, object_id):
+    connection = _write_connection()
+    if not is_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [document_rowid(kind, object_id)])
+        else:
+            cursor.execute(f"DELETE FROM {TABLE} WHERE kind = %s AND object_id = %s", [kind, object_id])
+
+
+def rebuild(chunk_size=2000):
+    """Empty the index and re-add every course and content item. Returns the document count."""
+    connection = _write_connection()
+    if not is_supported(connection):
+        return 0
+    total = 0
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABLE}")
+        for queryset, to_document in (
+            (Course.objects.only('title', 'description'), course_document),
+            (CourseContent.objects.only('course_id', 'title', 'text_content'), content_document),
+        ):
+            batch = []
+            for obj in queryset.order_by('pk').iterator(chunk_size=chunk_size):
+                batch.append(to_document(obj))
+                if len(batch) >= chunk_size:
+                    # The table was just emptied: plain inserts, no per-document DELETE.
+                    index_documents(batch, replace=False)
+                    total += len(batch)
+                    batch = []
+            index_documents(batch, replace=False)
+            total += len(batch)
+    return total
+
+
+def fts5_query(text):
+    # Each word becomes a quoted term, so user input can never be parsed as FTS5
+    # operators or column filters; terms are ANDed. No prefix ``*``: the porter
+    # tokenizer stems both sides already, and prefix terms are not stemmed alike.
+    return ' '.join(f'"{word}"' for word in WORD_RE.findall(text))
+
+
+def search(text, limit=20):
+    """Best-matching courses and content items for ``text``, highest rank first."""
+    connection = connections[router.db_for_read(Course)]
+    if connection.vendor == 'sqlite':
+        sql, query = SQLITE_SEARCH_SQL, fts5_query(text)
+    elif connection.vendor == 'postgresql':
+        sql, query = POSTGRES_SEARCH_SQL, text.strip()
+    else:
+        return []
+    if not query:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [query, limit])
+        return [SearchHit(*row) for row in cursor.fetchall()]
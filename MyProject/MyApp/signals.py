@@ -1,15 +1,85 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import Profile
+from .models import Profile, Course, CourseContent, QuizQuestion
+from .caching import bump_catalog_version, bump_profile_version
+from .grading import invalidate_answer_key
+from . import search
+from .thumbnails import refresh_thumbnails
+from .sqlite_tuning import configure_connection
 
 User = get_user_model()
 
+# The Profile row is created once with the user. There is deliberately no
+# "save profile on every user save" hook: User is saved on each login
+# (last_login), and Profile is edited through its own form.
 @receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    if created:
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
         Profile.objects.create(user=instance)
 
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=CourseContent)
+@receiver(post_delete, sender=CourseContent)
+def invalidate_catalog(sender, **kwargs):
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=QuizQuestion)
+@receiver(post_delete, sender=QuizQuestion)
+def invalidate_quiz_answer_key(sender, instance, **kwargs):
+    # After commit, so a grading in between cannot cache the old rows under the new version.
+    course_id = instance.course_id
+    transaction.on_commit(lambda: invalidate_answer_key(course_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Profile)
+def generate_profile_thumbnails(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_thumbnails(instance)
+
+
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs):
+    configure_connection(connection)
+
+
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    instance.profile.save()
+def invalidate_user_fragments(sender, instance, update_fields=None, **kwargs):
+    # The login-time last_login update does not change anything the fragments show.
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    bump_profile_version(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_profile_fragments(sender, instance, **kwargs):
+    bump_profile_version(instance.user_id)
+
+
+@receiver(post_save, sender=Course)
+def index_course(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_documents([search.course_document(instance)])
+
+
+@receiver(post_save, sender=CourseContent)
+def index_course_content(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_documents([search.content_document(instance)])
+
+
+@receiver(post_delete, sender=Course)
+def unindex_course(sender, instance, **kwargs):
+    search.remove_document(search.COURSE, instance.pk)
+
+
+@receiver(post_delete, sender=CourseContent)
+def unindex_course_content(sender, instance, **kwargs):
+    search.remove_document(search.CONTENT, instance.pk)
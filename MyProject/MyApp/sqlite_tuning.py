@@ -0,0 +1,14 @@
+from django.conf import settings
+
+
+def apply_pragmas(cursor, pragmas):
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_connection(connection):
+    """Apply SQLITE_PRAGMAS to a new SQLite connection when SQLITE_PERFORMANCE_MODE is on."""
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PERFORMANCE_MODE:
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, settings.SQLITE_PRAGMAS)
@@ -0,0 +1,18 @@
+from django import template
+from django.templatetags.static import static
+
+register = template.Library()
+
+DEFAULT_AVATAR = 'images/default-avatar.svg'
+
+
+@register.filter
+def avatar_url(owner, size):
+    """URL of the ``size`` px thumbnail of a User's or Profile's picture.
+
+    Falls back to the original upload until thumbnails have been generated, and to the
+    bundled default avatar when there is no picture at all.
+    """
+    if owner is None or not owner.profile_picture:
+        return static(DEFAULT_AVATAR)
+    return owner.thumbnail_url(size)
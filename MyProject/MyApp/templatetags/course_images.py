@@ -0,0 +1,45 @@
+import json
+from functools import lru_cache
+
+from django import template
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+register = template.Library()
+
+MANIFEST_NAME = 'course-images/manifest.json'
+
+
+@lru_cache(maxsize=1)
+def load_manifest():
+    """The variant manifest written by ``manage.py build_course_images`` (empty if not built)."""
+    path = finders.find(MANIFEST_NAME)
+    if not path:
+        return {}
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def _srcset(variants):
+    return ', '.join(f'{static(name)} {width}w' for width, name in sorted(variants.items(), key=lambda item: int(item[0])))
+
+
+@register.simple_tag
+def course_picture(course, sizes='(max-width: 600px) 100vw, 300px'):
+    """Render a course's artwork as a <picture> with WebP and fallback srcsets.
+
+    Falls back to a plain <img> for full URLs or when the build step has not been run.
+    """
+    entry = load_manifest().get(course.image_url)
+    if not entry:
+        return format_html('<img src="{}" alt="{}" loading="lazy">', course.image_src, course.title)
+
+    fallback = entry['fallback']
+    smallest = min(fallback, key=int)
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" loading="lazy" decoding="async"></picture>',
+        _srcset(entry['webp']), sizes,
+        static(fallback[smallest]), _srcset(fallback), sizes, course.title,
+    )
@@ -1,3 +1,962 @@
-from django.test import TestCase
+import json
+import tempfile
+import threading
+import time
+import warnings
+import zipfile
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, get_hasher, identify_hasher, make_password
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from .models import (User, Course, CourseContent, Enrollment, Profile, Achievement, CourseProgress,
+                     QuizQuestion, QuizAttempt, CourseStats, QuestionStats)
+from . import search
+from .analytics import refresh_rollups
+from .imports import import_bundle
+from .pagination import EstimatedCountPaginator
+from .caching import LocalLRUCache, get_profile_version
+from .checks import check_session_cache_is_shared
+from .delivery import parse_range
+from .middleware import PIN_COOKIE
+from .sqlite_tuning import configure_connection
+from .throttling import client_ip, login_buckets, reset_counters
+from .routers import REPLICA_ALIAS, ReplicaRouter
+from .templatetags.course_images import load_manifest
+from .grading import clear_local_answer_keys, get_answer_key, grade_submission
+
+# The query counts below assume the production session setup (cached_db on a
+# shared cache); a single test process can stand in for that with LocMem.
+cached_sessions = override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+
+
+@cached_sessions
+class CourseCatalogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('learner@example.com', 'Learner', 'pass12345')
+        self.client.force_login(self.user)
+
+    def test_catalog_lists_seeded_courses_with_counts(self):
+        course = Course.objects.get(title='Python Programming')
+        CourseContent.objects.create(course=course, title='Intro', content_type='Text')
+        Enrollment.objects.create(user=self.user, course=course)
+
+        response = self.client.get(reverse('courses'))
+
+        self.assertContains(response, 'Python Programming')
+        self.assertContains(response, reverse('enroll_course', args=[course.id]))
+        self.assertContains(response, '1 lesson &middot; 1 enrolled')
+
+    def test_catalog_query_count_is_bounded_and_cached(self):
+        for i in range(20):
+            Course.objects.create(title=f'Extra {i}', description='More')
+
+        # User lookup plus a single catalog query (the session comes from the cache).
+        with self.assertNumQueries(2):
+            self.client.get(reverse('courses'))
+        # A cache hit skips the catalog query entirely.
+        with self.assertNumQueries(1):
+            self.client.get(reverse('courses'))
+
+    def test_course_change_invalidates_listing(self):
+        self.client.get(reverse('courses'))
+        Course.objects.create(title='Rust Systems', description='Ownership and lifetimes.')
+
+        self.assertContains(self.client.get(reverse('courses')), 'Rust Systems')
+
+
+class EnrollmentTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('learner@example.com', 'Learner', 'pass12345')
+        self.course = Course.objects.get(title='Python Programming')
+        self.client.force_login(self.user)
+
+    def test_enroll_creates_a_single_row_on_double_submit(self):
+        url = reverse('enroll_course', args=[self.course.id])
+        self.client.post(url)
+        self.client.post(url)
+
+        self.assertEqual(Enrollment.objects.filter(user=self.user, course=self.course).count(), 1)
+
+    def test_bulk_enroll_skips_existing_enrollments(self):
+        users = User.objects.bulk_create([
+            User(email=f'cohort{i}@example.com', full_name=f'Cohort {i}') for i in range(25)
+        ])
+        Enrollment.objects.create(user=users[0], course=self.course)
+
+        created = Enrollment.objects.bulk_enroll(self.course, (u.pk for u in users), batch_size=10)
+
+        self.assertEqual(created, 24)
+        self.assertEqual(self.course.enrollments.count(), 25)
+
+
+class ProfileSignalTests(TestCase):
+    def test_login_does_not_write_profile(self):
+        user = User.objects.create_user('learner@example.com', 'Learner', 'pass12345')
+
+        with CaptureQueriesContext(connection) as captured:
+            self.client.force_login(user)
+        self.assertFalse(any('MyApp_profile' in q['sql'] for q in captured.captured_queries))
+
+    def test_bulk_created_users_get_profiles(self):
+        User.objects.bulk_create([User(email=f'bulk{i}@example.com', full_name='Bulk') for i in range(5)])
+
+        self.assertEqual(Profile.objects.filter(user__email__startswith='bulk').count(), 5)
+
+
+@cached_sessions
+class ProfileDashboardTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('learner@example.com', 'Learner', 'pass12345')
+        self.client.force_login(self.user)
+
+    def test_dashboard_lists_enrollments_and_achievements(self):
+        course = Course.objects.get(title='Cloud Computing')
+        Enrollment.objects.create(user=self.user, course=course, progress=40)
+        Achievement.objects.create(user=self.user, course=course, title='Cloud Badge')
+
+        response = self.client.get(reverse('profile'))
+
+        self.assertContains(response, 'Cloud Computing')
+        self.assertContains(response, 'Progress: 40%')
+        self.assertContains(response, 'Cloud Badge')
+
+    def test_dashboard_query_count_is_constant(self):
+        extra = Course.objects.bulk_create([Course(title=f'Course {i}', description='') for i in range(120)])
+        Enrollment.objects.bulk_create([
+            Enrollment(user=self.user, course=course, completed_at=timezone.now() if i % 2 else None)
+            for i, course in enumerate(extra)
+        ])
+        Achievement.objects.bulk_create([
+            Achievement(user=self.user, course=course, title=f'Award {i}') for i, course in enumerate(extra[:50])
+        ])
+
+        # User + profile, enrollments + courses, achievements + courses.
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('profile'))
+        self.assertContains(response, '60 of 120 completed')
+
+
+class CourseProgressTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('learner@example.com', 'Learner', 'pass12345')
+        self.course = Course.objects.get(title='Java Programming')
+        self.contents = CourseContent.objects.bulk_create([
+            CourseContent(course=self.course, title=f'Lesson {i}', content_type='Text', position=i) for i in range(4)
+        ])
+        self.enrollment = Enrollment.objects.create(user=self.user, course=self.course)
+
+    def test_completion_updates_progress_incrementally(self):
+        for content in self.contents[:3]:
+            # Progress UPDATE, INSERT fallback and one enrollment UPDATE, plus savepoints.
+            with self.assertNumQueries(7):
+                CourseProgress.objects.complete(self.user, content)
+        self.enrollment.refresh_from_db()
+        self.assertEqual((self.enrollment.progress, self.enrollment.completed_at), (75, None))
+
+        self.assertFalse(CourseProgress.objects.complete(self.user, self.contents[0]))
+        CourseProgress.objects.complete(self.user, self.contents[3])
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.progress, 100)
+        self.assertIsNotNone(self.enrollment.completed_at)
+
+    def test_reconcile_progress_fixes_drift(self):
+        CourseProgress.objects.create(user=self.user, content=self.contents[0], completed=True)
+        CourseProgress.objects.create(user=self.user, content=self.contents[1], completed=True)
+
+        call_command('reconcile_progress', stdout=StringIO())
+
+        self.enrollment.refresh_from_db()
+        self.assertEqual((self.enrollment.completed_contents, self.enrollment.progress), (2, 50))
+
+
+class MyCoursesTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('learner@example.com', 'Learner', 'pass12345')
+        self.courses = list(Course.objects.order_by('pk')[:3])
+        for course in self.courses:
+            Enrollment.objects.create(user=self.user, course=course)
+        # Same timestamp everywhere, so the id half of the key decides the order.
+        Enrollment.objects.update(enrolled_at=timezone.now())
+        self.contents = CourseContent.objects.bulk_create([
+            CourseContent(course=self.courses[0], title=f'Lesson {i}', content_type='Text', position=i) for i in range(2)
+        ])
+        CourseProgress.objects.complete(self.user, self.contents[0])
+
+    def test_page_annotates_next_unfinished_content_in_one_query(self):
+        with self.assertNumQueries(1):
+            rows, key = async_to_sync(self.user.enrollments.select_related('course').with_next_content().akeyset_page)(size=5)
+            titles = {row.course.title: row.next_content_title for row in rows}
+        self.assertIsNone(key)
+        self.assertEqual(titles[self.courses[0].title], 'Lesson 1')
+        self.assertIsNone(titles[self.courses[1].title])
+
+    @override_settings(MY_COURSES_PAGE_SIZE=2)
+    def test_cursor_continues_after_previous_page(self):
+        self.client.force_login(self.user)
+        first = self.client.get(reverse('my_courses'))
+        self.assertEqual(len(first.context['enrollments']), 2)
+
+        second = self.client.get(reverse('my_courses'), {'after': first.context['next_cursor']})
+        self.assertEqual([e.course for e in second.context['enrollments']], [self.courses[0]])
+        self.assertIsNone(second.context['next_cursor'])
+        self.assertEqual(self.client.get(reverse('my_courses'), {'after': 'bogus'}).status_code, 404)
+
+    def test_page_shows_flash_messages(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('enroll_course', args=[self.courses[0].id]), follow=True)
+
+        self.assertContains(response, f'You are already enrolled in {self.courses[0].title}.')
+
+    def test_next_content_can_be_marked_complete(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('complete_content', args=[self.contents[1].id]), follow=True)
+        self.assertContains(response, 'Marked Lesson 1 as completed.')
+
+        self.courses[1].contents.create(title='Setup', content_type='Text')
+        self.assertContains(self.client.get(reverse('my_courses')),
+                            f'action="{reverse("complete_content", args=[self.courses[1].contents.get().id])}"')
+
+    def test_each_enrollment_links_to_its_quiz(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('my_courses'))
+        for course in self.courses:
+            self.assertContains(response, reverse('course_quiz', args=[course.id]))
+
+
+@cached_sessions
+class QuizGradingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_answer_keys()
+        self.user = User.objects.create_user('learner@example.com', 'Learner', 'pass12345')
+        self.course = Course.objects.get(title='Machine Learning')
+        self.questions = QuizQuestion.objects.bulk_create([
+            QuizQuestion(course=self.course, question_text=f'Q{i}', option_1='a', option_2='b',
+                         option_3='c', option_4='d', correct_option=1 + i % 4)
+            for i in range(50)
+        ])
+        Enrollment.objects.create(user=self.user, course=self.course)
+        self.client.force_login(self.user)
+
+    def test_submission_is_graded_in_bounded_queries(self):
+        answers = {f'question_{q.pk}': q.correct_option if i < 40 else 1 + q.correct_option % 4
+                   for i, q in enumerate(self.questions)}
+
+        # User, course check, answer key, attempt upsert, score update, savepoints.
+        with self.assertNumQueries(7):
+            self.client.post(reverse('course_quiz', args=[self.course.id]), answers)
+
+        self.assertEqual(QuizAttempt.objects.filter(user=self.user, is_correct=True).count(), 40)
+        self.assertEqual(Enrollment.objects.get(user=self.user, course=self.course).score, 80)
+
+    def test_resubmission_updates_existing_attempts(self):
+        question = self.questions[0]
+        grade_submission(self.user, self.course, {question.pk: 4})
+        grade_submission(self.user, self.course, {question.pk: question.correct_option})
+
+        attempt = QuizAttempt.objects.get(user=self.user, question=question)
+        self.assertTrue(attempt.is_correct)
+
+    def test_answer_key_is_cached_and_invalidated_on_question_save(self):
+        key = get_answer_key(self.course.pk)
+        self.assertEqual(len(key), 50)
+        self.assertEqual(key.get(self.questions[1].pk), 2)
+        self.assertIsNone(key.get(-1))
+
+        with self.assertNumQueries(0):
+            get_answer_key(self.course.pk)
+
+        question = self.questions[1]
+        question.correct_option = 4
+        with self.captureOnCommitCallbacks(execute=True):
+            question.save()
+            # Not before the save commits.
+            self.assertEqual(get_answer_key(self.course.pk).get(question.pk), 2)
+        self.assertEqual(get_answer_key(self.course.pk).get(question.pk), 4)
+
+    def test_local_answer_keys_expire(self):
+        local = LocalLRUCache(timeout=60)
+        local.set('key', 'value')
+        with mock.patch('MyApp.caching.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertIsNone(local.get('key'))
+
+
+class AdminChangelistTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin@example.com', 'Admin', 'pass12345')
+        self.course = Course.objects.get(title='Java Programming')
+        self.questions = [
+            QuizQuestion.objects.create(course=self.course, question_text=f'Q{i}', option_1='a', option_2='b',
+                                        option_3='c', option_4='d', correct_option=1)
+            for i in range(5)
+        ]
+        self.client.force_login(self.admin)
+
+    def attempts_changelist_queries(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('admin:MyApp_quizattempt_changelist'))
+        self.assertEqual(response.status_code, 200)
+        return len(captured)
+
+    def test_attempt_changelist_query_count_does_not_grow_with_rows(self):
+        grade_submission(self.admin, self.course, {self.questions[0].pk: 1})
+        baseline = self.attempts_changelist_queries()
+        grade_submission(self.admin, self.course, {question.pk: 2 for question in self.questions})
+        self.assertEqual(self.attempts_changelist_queries(), baseline)
+
+    @override_settings(ADMIN_COUNT_LIMIT=3)
+    def test_paginator_estimates_unfiltered_and_caps_filtered_counts(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        QuizQuestion.objects.create(course=self.course, question_text='Late', option_1='a', option_2='b',
+                                    option_3='c', option_4='d', correct_option=1)
+
+        # Planner statistics still say 5 rows.
+        self.assertEqual(EstimatedCountPaginator(QuizQuestion.objects.order_by('pk'), 2).count, 5)
+        self.assertEqual(EstimatedCountPaginator(QuizQuestion.objects.filter(course=self.course).order_by('pk'), 2).count, 3)
+
+    def test_user_admin_hashes_passwords(self):
+        response = self.client.post(reverse('admin:MyApp_user_add'), {
+            'email': 'new@example.com', 'full_name': 'New', 'role': 'Student', 'usable_password': 'true',
+            'password1': 'Str0ng-pass-123', 'password2': 'Str0ng-pass-123',
+        })
+        self.assertEqual(response.status_code, 302)
+        user = User.objects.get(email='new@example.com')
+        self.assertTrue(user.check_password('Str0ng-pass-123'))
+
+        change = self.client.get(reverse('admin:MyApp_user_change', args=[user.pk]))
+        self.assertNotContains(change, 'name="password"')
+        self.assertContains(change, 'href="../password/"')
+        self.assertEqual(self.client.get(reverse('admin:auth_user_password_change', args=[user.pk])).status_code, 200)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('learner@example.com', 'Learner', 'pass12345')
+        self.staff = User.objects.create_superuser('staff@example.com', 'Staff', 'pass12345')
+        self.courses = list(Course.objects.order_by('pk')[:2])
+        for course in self.courses:
+            Enrollment.objects.create(user=self.user, course=course)
+
+    def test_staff_download_streams_filtered_csv(self):
+        self.client.force_login(User.objects.create_superuser('admin@example.com', 'Admin', 'pass12345'))
+        response = self.client.get(reverse('export_data', args=['enrollments']), {'course': self.courses[1].pk})
+
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['id', 'user_id', 'user__email'])
+        self.assertEqual(len(lines), 2)
+        self.assertIn(self.courses[1].title, lines[1])
+
+        bad = self.client.get(reverse('export_data', args=['enrollments']), {'since': 'yesterday'})
+        self.assertEqual(bad.status_code, 400)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('export_data', args=['enrollments'])).status_code, 302)
+
+    async def test_asgi_download_streams_without_buffering(self):
+        await self.async_client.aforce_login(self.staff)
+        with override_settings(EXPORT_CHUNK_SIZE=1):
+            response = await self.async_client.get(reverse('export_data', args=['enrollments']))
+            chunks = [chunk async for chunk in response.streaming_content]
+
+        self.assertTrue(response.is_async)
+        # Header plus one chunk per enrollment, not one buffered body.
+        self.assertEqual(len(chunks), 3)
+
+    def test_command_writes_jsonl_within_date_range(self):
+        Enrollment.objects.filter(course=self.courses[0]).update(enrolled_at=timezone.now() - timedelta(days=30))
+        out = StringIO()
+        call_command('export_data', 'enrollments', format='jsonl', since=str(timezone.localdate() - timedelta(days=1)),
+                     chunk_size=1, stdout=out)
+
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([row['course_id'] for row in rows], [self.courses[1].pk])
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(title='Kubernetes Fundamentals', description='Deploy containers at scale')
+        self.lesson = CourseContent.objects.create(course=self.course, title='Pods', content_type='Text',
+                                                   text_content='Schedule kubernetes workloads')
+
+    def test_index_follows_saves_and_deletes_with_ranked_hits(self):
+        hits = search.search('kubernetes')
+        self.assertEqual([(hit.kind, hit.object_id) for hit in hits],
+                         [('course', self.course.pk), ('content', self.lesson.pk)])
+
+        self.lesson.title = 'Deployments'
+        self.lesson.save()
+        self.assertEqual(search.search('deployments')[0].title, 'Deployments')
+
+        self.course.delete()
+        self.assertEqual(search.search('kubernetes'), [])
+
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite only')
+    def test_documents_are_keyed_by_rowid(self):
+        self.lesson.save()
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT rowid FROM {search.TABLE} WHERE kind = %s AND object_id = %s",
+                           [search.CONTENT, self.lesson.pk])
+            rows = cursor.fetchall()
+        self.assertEqual(rows, [(search.document_rowid(search.CONTENT, self.lesson.pk),)])
+
+    def test_operators_in_user_input_are_treated_as_words(self):
+        self.assertEqual(len(search.search('kubern* OR "pods" NEAR(')), 0)
+        self.assertEqual(search.search('contain')[0].object_id, self.course.pk)
+
+    def test_rebuild_and_search_page(self):
+        CourseContent.objects.bulk_create([
+            CourseContent(course=self.course, title='Helm charts', content_type='Text'),
+        ])
+        self.assertEqual(search.search('helm'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(search.search('helm')), 1)
+
+        self.client.force_login(User.objects.create_user('learner@example.com', 'Learner', 'pass12345'))
+        self.assertContains(self.client.get(reverse('search'), {'q': 'helm'}), 'Lesson in Kubernetes Fundamentals')
+
+
+@override_settings(ANALYTICS_WATERMARK_OVERLAP=0)
+class InstructorAnalyticsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.instructor = User.objects.create_user('teacher@example.com', 'Teacher', 'pass12345', role='Instructor')
+        self.course = Course.objects.create(title='Analytics 101', description='', created_by=self.instructor)
+        self.questions = [
+            QuizQuestion.objects.create(course=self.course, question_text=f'Q{i}', option_1='a', option_2='b',
+                                        option_3='c', option_4='d', correct_option=1)
+            for i in range(2)
+        ]
+        self.students = [User.objects.create_user(f's{i}@example.com', f'Student {i}', None) for i in range(2)]
+        for student in self.students:
+            Enrollment.objects.create(user=student, course=self.course)
+            grade_submission(student, self.course, {self.questions[0].pk: 1, self.questions[1].pk: 2})
+
+    def test_incremental_refresh_recounts_only_touched_questions(self):
+        refresh_rollups(full=True)
+        stats = CourseStats.objects.get(course=self.course)
+        self.assertEqual((stats.enrollment_count, stats.average_score), (2, 50))
+        QuestionStats.objects.filter(question=self.questions[0]).update(attempt_count=99)
+
+        grade_submission(self.students[0], self.course, {self.questions[1].pk: 1})
+        result = refresh_rollups()
+
+        self.assertEqual(result.questions, 1)
+        self.assertEqual(QuestionStats.objects.get(question=self.questions[1]).correct_count, 1)
+        self.assertEqual(QuestionStats.objects.get(question=self.questions[1]).attempt_count, 2)
+        # Untouched since the watermark, so not re-aggregated.
+        self.assertEqual(QuestionStats.objects.get(question=self.questions[0]).attempt_count, 99)
+
+    def test_dashboard_is_served_from_rollups(self):
+        call_command('refresh_analytics', stdout=StringIO())
+        self.client.force_login(self.instructor)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('instructor_dashboard'))
+        self.assertContains(response, 'Analytics 101')
+        self.assertFalse(any('myapp_quizattempt' in q['sql'].lower() for q in captured))
+
+        self.client.force_login(self.students[0])
+        self.assertEqual(self.client.get(reverse('instructor_dashboard')).status_code, 404)
+
+
+def course_bundle(contents, questions='', files=None):
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('contents.csv', contents)
+        if questions:
+            archive.writestr('questions.jsonl', questions)
+        for name, data in (files or {}).items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class CourseImportTests(TestCase):
+    contents = (
+        'title,content_type,position,text_content,file\n'
+        'Welcome,Text,1,Orientation for the module,\n'
+        'Lecture,Video,2,,videos/lecture.mp4\n'
+    )
+    questions = '\n'.join(json.dumps({
+        'question_text': f'Question {i}', 'option_1': 'a', 'option_2': 'b', 'option_3': 'c', 'option_4': 'd',
+        'correct_option': 2,
+    }) for i in range(2))
+
+    def setUp(self):
+        cache.clear()
+        clear_local_answer_keys()
+        self.instructor = User.objects.create_user('teacher@example.com', 'Teacher', 'pass12345', role='Instructor')
+        self.course = Course.objects.create(title='Imported', description='', created_by=self.instructor)
+
+    def test_invalid_rows_and_dry_runs_write_nothing(self):
+        bad = course_bundle('title,content_type,file\nIntro,Audio,\nSlides,PDF,missing.pdf\n')
+        report = import_bundle(bad, self.course)
+        self.assertEqual(len(report.errors), 2)
+
+        report = import_bundle(course_bundle(self.contents, self.questions, {'videos/lecture.mp4': b'mp4'}),
+                               self.course, dry_run=True)
+        self.assertEqual((report.errors, report.contents, report.questions, report.files), ([], 2, 2, 1))
+        self.assertFalse(self.course.contents.exists())
+
+    def test_malformed_rows_are_reported_not_raised(self):
+        bundle = course_bundle('title,content_type,text_content\nIntro,Text,Hello, world\n', '5\n["a"]\n')
+
+        report = import_bundle(bundle, self.course)
+
+        self.assertEqual(report.errors, [
+            'contents row 1: too many fields',
+            'questions row 1: expected an object, got int',
+            'questions row 2: expected an object, got list',
+        ])
+
+    def test_import_stores_files_and_refreshes_unsignalled_caches(self):
+        self.assertEqual(len(get_answer_key(self.course.pk)), 0)
+        bundle = course_bundle(self.contents, self.questions, {'videos/lecture.mp4': b'mp4'})
+
+        report = import_bundle(bundle, self.course, batch_size=1)
+
+        self.assertEqual(set(report.timings), {'validate', 'store files', 'insert', 'invalidate'})
+        lecture = self.course.contents.get(title='Lecture')
+        self.assertEqual(lecture.video_file.read(), b'mp4')
+        self.assertEqual(len(get_answer_key(self.course.pk)), 2)
+        self.assertEqual(search.search('orientation')[0].title, 'Welcome')
+
+    def test_upload_view_is_limited_to_course_owner(self):
+        self.client.force_login(self.instructor)
+        url = reverse('import_course_bundle', args=[self.course.id])
+        upload = SimpleUploadedFile('bundle.zip', course_bundle(self.contents, files={'videos/lecture.mp4': b'mp4'}).read())
+        self.assertContains(self.client.post(url, {'bundle': upload, 'dry_run': 'on'}), 'Dry run passed')
+
+        self.client.force_login(User.objects.create_user('other@example.com', 'Other', 'pass12345', role='Instructor'))
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ContentFileTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('learner@example.com', 'Learner', 'pass12345')
+        course = Course.objects.get(title='Data Analytics')
+        self.content = CourseContent.objects.create(course=course, title='Lecture 1', content_type='Video')
+        self.content.video_file.save('lecture.mp4', ContentFile(bytes(range(256)) * 4))
+        Enrollment.objects.create(user=self.user, course=course)
+        self.url = reverse('content_file', args=[self.content.id, 'video'])
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+
+    async def test_full_download_streams_file(self):
+        response = await self.async_client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(len(b''.join([chunk async for chunk in response.streaming_content])), 1024)
+
+    async def test_range_request_returns_partial_content(self):
+        response = await self.async_client.get(self.url, headers={'Range': 'bytes=10-19'})
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/1024')
+        self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), bytes(range(10, 20)))
+        self.assertEqual((await self.async_client.get(self.url, headers={'Range': 'bytes=5000-'})).status_code, 416)
+        with self.assertRaises(ValueError):
+            parse_range('bytes=-5', 0)
+        # last < first is not a valid range, so it is ignored rather than refused.
+        self.assertEqual((await self.async_client.get(self.url, headers={'Range': 'bytes=20-10'})).status_code, 200)
+
+    def test_full_download_under_wsgi_streams_synchronously(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            response = self.client.get(self.url)
+            body = b''.join(response.streaming_content)
+
+        self.assertEqual(body, bytes(range(256)) * 4)
+        self.assertFalse(response.is_async)
+        self.assertEqual([str(warning.message) for warning in caught if 'asynchronous iterators' in str(warning.message)], [])
+
+    def test_matching_etag_returns_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_requires_enrollment(self):
+        Enrollment.objects.all().delete()
+
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    @override_settings(CONTENT_SENDFILE_MODE='x-accel-redirect')
+    def test_accel_redirect_mode_delegates_to_web_server(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.content.video_file.name)
+        self.assertEqual(response.content, b'')
+
+        self.content.video_file.save('week 1 café.mp4', ContentFile(b'data'))
+        response = self.client.get(self.url)
+        self.assertTrue(response['X-Accel-Redirect'].endswith('/week_1_caf%C3%A9.mp4'), response['X-Accel-Redirect'])
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ProfileThumbnailTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('learner@example.com', 'Learner', 'pass12345')
+        self.profile = self.user.profile
+
+    def _upload(self, size=(800, 600)):
+        buffer = BytesIO()
+        Image.new('RGB', size, 'teal').save(buffer, 'JPEG')
+        return ContentFile(buffer.getvalue(), name='photo.jpg')
+
+    def test_upload_generates_thumbnail_variants(self):
+        self.profile.profile_picture = self._upload()
+        self.profile.save()
+
+        self.profile.refresh_from_db()
+        variants = self.profile.profile_picture_variants
+        self.assertEqual(variants['source'], self.profile.profile_picture.name)
+        with self.profile.profile_picture.storage.open(variants['120']) as handle:
+            self.assertEqual(Image.open(handle).size, (120, 120))
+        self.assertTrue(self.profile.thumbnail_url(40).endswith('_40.webp'))
+
+    def test_replacing_the_picture_deletes_old_thumbnails(self):
+        self.profile.profile_picture = self._upload()
+        self.profile.save()
+        old = self.profile.profile_picture_variants
+        storage = self.profile.profile_picture.storage
+
+        self.profile.profile_picture = ContentFile(self._upload().read(), name='portrait.jpg')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.save()
+
+        self.assertFalse(any(storage.exists(old[size]) for size in ('40', '120', '240')))
+        self.assertTrue(storage.exists(self.profile.profile_picture_variants['120']))
+
+    def test_backfill_command_fills_missing_variants(self):
+        name = self.profile.profile_picture.storage.save('profile_pics/old.jpg', self._upload())
+        Profile.objects.filter(pk=self.profile.pk).update(profile_picture=name)
+
+        call_command('backfill_thumbnails', '--workers', '2', stdout=StringIO())
+
+        self.profile.refresh_from_db()
+        self.assertEqual(set(self.profile.profile_picture_variants), {'source', '40', '120', '240'})
+
+
+class CourseImageBuildTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        load_manifest.cache_clear()
+        self.addCleanup(load_manifest.cache_clear)
+
+    def test_catalog_emits_srcset_for_built_images(self):
+        output = tempfile.mkdtemp()
+        with override_settings(STATICFILES_DIRS=[output], COURSE_IMAGE_WIDTHS=(160,)):
+            call_command('build_course_images', '--output', output, stdout=StringIO())
+            self.client.force_login(User.objects.create_user('learner@example.com', 'Learner', 'pass12345'))
+            response = self.client.get(reverse('courses'))
+
+        self.assertContains(response, '<source type="image/webp" srcset="/static/course-images/python.160w.')
+        self.assertNotContains(response, 'images/python.png')
+
+
+class IndexUsageTests(TestCase):
+    """EXPLAIN the hot lookups and check the planner picks the intended index."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('learner@example.com', 'Learner', 'pass12345')
+        self.course = Course.objects.get(title='Cyber Security')
+        if connection.vendor == 'postgresql':
+            # Test tables are tiny, so make PostgreSQL prefer indexes the way it does at scale.
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f'{index_name} not used:\n{plan}')
+
+    def test_hot_queries_use_indexes(self):
+        hot_queries = [
+            (Enrollment.objects.filter(user=self.user, completed_at__isnull=False), 'enrollment_user_completed_idx'),
+            (self.user.achievements.order_by('-date_awarded'), 'achievement_user_awarded_idx'),
+            (self.course.contents.all(), 'content_course_position_idx'),
+            (QuizAttempt.objects.filter(course=self.course, user=self.user), 'attempt_course_user_idx'),
+            (Course.objects.order_by('-created_at', 'id')[:20], 'course_created_idx'),
+        ]
+        for queryset, index_name in hot_queries:
+            with self.subTest(index=index_name):
+                self.assertUsesIndex(queryset, index_name)
+
+
+@override_settings(DATABASES={**settings.DATABASES, REPLICA_ALIAS: settings.DATABASES['default']})
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('learner@example.com', 'Learner', 'pass12345')
+        self.client.force_login(self.user)
+        self.routed = []
+        db_for_read = ReplicaRouter.db_for_read
+
+        def spy(router, model, **hints):
+            # Record the routing decision but keep the query on the test database.
+            self.routed.append(db_for_read(router, model, **hints))
+            return None
+
+        patcher = mock.patch.object(ReplicaRouter, 'db_for_read', spy)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_read_only_view_reads_from_replica(self):
+        self.client.get(reverse('profile'))
+
+        self.assertIn(REPLICA_ALIAS, self.routed)
+
+    def test_write_pins_client_to_primary(self):
+        response = self.client.post(reverse('enroll_course', args=[Course.objects.first().pk]))
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertNotIn(REPLICA_ALIAS, self.routed)
+
+        self.routed.clear()
+        self.client.get(reverse('profile'))
+        self.assertNotIn(REPLICA_ALIAS, self.routed)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite only')
+class SQLiteTuningTests(TransactionTestCase):
+    # Pragmas such as synchronous cannot change inside TestCase's transaction.
+    serialized_rollback = True
+
+    @override_settings(SQLITE_PERFORMANCE_MODE=True)
+    def test_performance_mode_applies_pragmas(self):
+        configure_connection(connection)
+
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+
+    def test_maintenance_command_runs(self):
+        out = StringIO()
+        call_command('sqlite_maintenance', stdout=out)
+
+        self.assertIn('ANALYZE and optimize done', out.getvalue())
+
+
+class LoginBackendTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_login_throttles()
+        self.user = User.objects.create_user('learner@example.com', 'Learner', 'pass12345', role='Student')
+
+    def login(self, role='Student', password='pass12345'):
+        return self.client.post(reverse('login'), {'email': 'learner@example.com', 'password': password, 'role': role})
+
+    def test_login_with_matching_role(self):
+        self.assertRedirects(self.login(), reverse('courses'))
+
+    def test_role_mismatch_is_rejected_without_checking_the_password(self):
+        with mock.patch.object(User, 'check_password') as check_password:
+            response = self.login(role='Instructor')
+
+        check_password.assert_not_called()
+        self.assertContains(response, 'Invalid email, password or role.')
+
+    def test_login_rehashes_password_when_cost_changes(self):
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=1000):
+            self.login()
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_login_upgrades_old_hashes_to_the_configured_hasher(self):
+        # A hash from Django's default 1,000,000-iteration PBKDF2, then one from a legacy algorithm.
+        for old_hash in (make_password('pass12345', hasher=PBKDF2PasswordHasher()),
+                         make_password('pass12345', hasher='pbkdf2_sha1')):
+            User.objects.filter(pk=self.user.pk).update(password=old_hash)
+            self.client.logout()
+            self.login()
+
+            self.user.refresh_from_db()
+            self.assertEqual(identify_hasher(self.user.password).algorithm, get_hasher().algorithm)
+            self.assertNotEqual(self.user.password, old_hash)
+            self.assertTrue(self.user.check_password('pass12345'))
+
+
+def reset_login_throttles():
+    for bucket in login_buckets.values():
+        bucket.reset_local()
+    reset_counters()
+
+
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_login_throttles()
+        User.objects.create_user('learner@example.com', 'Learner', 'pass12345')
+
+    def attempt(self, email='learner@example.com'):
+        return self.client.post(reverse('login'), {'email': email, 'password': 'wrong', 'role': 'Student'})
+
+    def test_email_is_throttled_before_authenticate(self):
+        capacity = settings.LOGIN_THROTTLE_RATES['email'][0]
+        for _ in range(capacity):
+            self.assertEqual(self.attempt().status_code, 200)
+
+        with mock.patch('MyApp.views.authenticate') as authenticate:
+            response = self.attempt()
+        self.assertEqual(response.status_code, 429)
+        authenticate.assert_not_called()
+
+    def test_metrics_endpoint_reports_counters(self):
+        self.attempt()
+
+        body = self.client.get(reverse('throttle_metrics'), REMOTE_ADDR='127.0.0.1').content.decode()
+        self.assertIn('careercraft_login_throttle_total{scope="login-email",outcome="allowed",', body)
+        self.assertIn('"} 1\n', body)
+        self.assertEqual(self.client.get(reverse('throttle_metrics'), REMOTE_ADDR='10.1.2.3').status_code, 404)
+
+    @override_settings(TRUSTED_PROXIES=['127.0.0.1'])
+    def test_metrics_endpoint_checks_the_forwarded_client_behind_a_proxy(self):
+        response = self.client.get(reverse('throttle_metrics'), REMOTE_ADDR='127.0.0.1',
+                                   HTTP_X_FORWARDED_FOR='203.0.113.7')
+        self.assertEqual(response.status_code, 404)
+
+    def test_local_rejection_skips_the_shared_cache(self):
+        bucket = login_buckets['email']
+        for _ in range(bucket.capacity):
+            bucket.consume('drained@example.com')
+
+        with mock.patch('MyApp.throttling.cache') as shared:
+            self.assertFalse(bucket.consume('drained@example.com'))
+        self.assertEqual(shared.mock_calls, [])
+
+    @override_settings(TRUSTED_PROXIES=['10.0.0.1'])
+    def test_client_ip_comes_from_trusted_proxy_header(self):
+        request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='6.6.6.6, 203.0.113.7')
+        self.assertEqual(client_ip(request), '203.0.113.7')
+        request = RequestFactory().get('/', REMOTE_ADDR='198.51.100.2', HTTP_X_FORWARDED_FOR='6.6.6.6')
+        self.assertEqual(client_ip(request), '198.51.100.2')
+
+
+class SessionTests(TestCase):
+    def test_purge_sessions_deletes_only_expired_sessions(self):
+        now = timezone.now()
+        Session.objects.bulk_create(
+            [Session(session_key=f'expired{i}', session_data='', expire_date=now - timedelta(days=1)) for i in range(7)]
+            + [Session(session_key='live', session_data='', expire_date=now + timedelta(days=1))]
+        )
+
+        call_command('purge_sessions', '--batch-size', '3', stdout=StringIO())
+
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['live'])
+
+    @cached_sessions
+    def test_login_message_does_not_touch_the_session_table(self):
+        user = User.objects.create_user('learner@example.com', 'Learner', 'pass12345')
+        self.client.force_login(user)
+
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(reverse('courses'))
+        self.assertFalse(any('django_session' in query['sql'] for query in captured.captured_queries))
+
+    def test_cache_sessions_are_refused_on_a_per_process_cache(self):
+        with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db'):
+            self.assertEqual([error.id for error in check_session_cache_is_shared(None)], ['MyApp.E001'])
+        with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db'):
+            self.assertEqual(check_session_cache_is_shared(None), [])
+
+
+class ProfileFragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('learner@example.com', 'Learner', 'pass12345')
+        self.client.force_login(self.user)
+
+    def test_nav_fragment_is_cached_until_profile_changes(self):
+        self.assertContains(self.client.get(reverse('courses')), 'Learner')
+        User.objects.filter(pk=self.user.pk).update(full_name='Renamed')
+        # Still served from the fragment cache: the queryset update sent no signal.
+        self.assertNotContains(self.client.get(reverse('courses')), 'Renamed')
+
+        self.user.refresh_from_db()
+        self.user.save()
+        self.assertContains(self.client.get(reverse('courses')), 'Renamed')
+
+    def test_login_does_not_invalidate_fragments(self):
+        version = get_profile_version(self.user.pk)
+        self.client.force_login(self.user)
+
+        self.assertEqual(get_profile_version(self.user.pk), version)
+
+
+class TemplateStylesheetTests(TestCase):
+    def test_pages_link_shared_stylesheets_instead_of_inline_styles(self):
+        self.client.force_login(User.objects.create_user('learner@example.com', 'Learner', 'pass12345'))
+        for name in ('login', 'signup', 'courses', 'about'):
+            response = self.client.get(reverse(name))
+            self.assertTemplateUsed(response, 'base.html')
+            self.assertNotContains(response, '<style>')
+        self.assertContains(self.client.get(reverse('login')), 'css/careercraft.css')
+
+    def test_bench_templates_reports_each_page(self):
+        out = StringIO()
+        call_command('bench_templates', 'login.html', 'about.html', iterations=2, stdout=out)
+        self.assertIn('login.html', out.getvalue())
+        self.assertIn('about.html', out.getvalue())
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200 if self.path == '/ok/' else 302)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('learner@example.com', 'Learner', 'pass12345')
+        Enrollment.objects.create(user=self.user, course=Course.objects.get(title='Python Programming'))
+
+    async def test_read_views_serve_under_async_client(self):
+        await self.async_client.aforce_login(self.user)
+
+        for name in ('courses', 'my_courses', 'profile'):
+            response = await self.async_client.get(reverse(name))
+            self.assertContains(response, 'Python Programming')
+        await self.async_client.alogout()
+        self.assertEqual((await self.async_client.get(reverse('my_courses'))).status_code, 302)
+
+    def test_bench_http_reports_each_target(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _OkHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f'http://127.0.0.1:{server.server_port}'
+        out = StringIO()
+
+        call_command('bench_http', f'wsgi={url}', f'asgi={url}', '--path', '/ok/', '--path', '/login/',
+                     '--requests', '4', '--concurrency', '2', stdout=out)
+
+        rows = [line.split() for line in out.getvalue().splitlines()[1:]]
+        self.assertEqual([(row[0], row[1], row[3]) for row in rows], [
+            ('wsgi', '/ok/', '0'), ('wsgi', '/login/', '4'), ('asgi', '/ok/', '0'), ('asgi', '/login/', '4'),
+        ])
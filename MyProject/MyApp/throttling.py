@@ -0,0 +1,116 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .caching import LocalLRUCache
+
+OUTCOMES = ('allowed', 'rejected_local', 'rejected_shared')
+
+
+class TokenBucket:
+    """Rate limit one scope (e.g. login attempts per IP) to ``capacity`` per ``period`` seconds.
+
+    Each check first consumes from a bucket held in this process, which refills
+    continuously; a key that is already drained here is rejected without a cache round
+    trip. Otherwise a counter for the current period is incremented atomically in the
+    shared cache, so the limit holds across all workers. Outcomes are tallied in
+    process memory for the metrics endpoint.
+    """
+
+    def __init__(self, scope, capacity, period):
+        self.scope = scope
+        self.capacity = capacity
+        self.period = period
+        self._local = LocalLRUCache(settings.THROTTLE_LOCAL_KEYS)
+        self._lock = threading.Lock()
+
+    def consume(self, identity):
+        key = f'throttle:{self.scope}:{hashlib.sha1(identity.encode()).hexdigest()}'
+        if not self._consume_local(key):
+            outcome = 'rejected_local'
+        elif not self._consume_shared(key):
+            outcome = 'rejected_shared'
+        else:
+            outcome = 'allowed'
+        _count(self.scope, outcome)
+        return outcome == 'allowed'
+
+    def _consume_local(self, key):
+        now = time.monotonic()
+        with self._lock:
+            tokens, stamp = self._local.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - stamp) * self.capacity / self.period)
+            if tokens < 1:
+                self._local.set(key, (tokens, now))
+                return False
+            self._local.set(key, (tokens - 1, now))
+        return True
+
+    def _consume_shared(self, key):
+        window_key = f'{key}:{int(time.time() // self.period)}'
+        cache.add(window_key, 0, timeout=self.period * 2)
+        try:
+            used = cache.incr(window_key)
+        except ValueError:
+            # Evicted between add() and incr().
+            cache.set(window_key, 1, timeout=self.period * 2)
+            used = 1
+        return used <= self.capacity
+
+    def reset_local(self):
+        self._local.clear()
+
+
+# Outcome counts are kept per worker process, so counting never costs a cache
+# round trip (which would defeat the local reject path).
+_counts = Counter()
+_counts_lock = threading.Lock()
+
+
+def _count(scope, outcome):
+    with _counts_lock:
+        _counts[scope, outcome] += 1
+
+
+def counters():
+    """``{(scope, outcome): count}`` for every configured login throttle, in this worker process."""
+    with _counts_lock:
+        return {
+            (bucket.scope, outcome): _counts[bucket.scope, outcome]
+            for bucket in login_buckets.values() for outcome in OUTCOMES
+        }
+
+
+def reset_counters():
+    with _counts_lock:
+        _counts.clear()
+
+
+def client_ip(request):
+    """The address to throttle: REMOTE_ADDR, unless that is one of TRUSTED_PROXIES, in
+    which case the right-most X-Forwarded-For hop that is not a trusted proxy."""
+    address = request.META.get('REMOTE_ADDR')
+    if address not in settings.TRUSTED_PROXIES:
+        return address
+    hops = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if hop.strip()]
+    for hop in reversed(hops):
+        if hop not in settings.TRUSTED_PROXIES:
+            return hop
+    return address
+
+
+login_buckets = {
+    scope: TokenBucket(f'login-{scope}', capacity, period)
+    for scope, (capacity, period) in settings.LOGIN_THROTTLE_RATES.items()
+}
+
+
+def allow_login_attempt(ip, email):
+    """Consume one login attempt for the client IP, then for the email; stop at the first limit hit."""
+    if not login_buckets['ip'].consume(ip or 'unknown'):
+        return False
+    return login_buckets['email'].consume(email.strip().lower())
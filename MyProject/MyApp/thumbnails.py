@@ -0,0 +1,65 @@
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+
+def variant_name(name, size):
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, 'thumbs', f'{stem}_{size}.{settings.THUMBNAIL_FORMAT.lower()}')
+
+
+def render_variants(name, storage=default_storage):
+    """Write a square thumbnail of ``name`` for every THUMBNAIL_SIZES entry.
+
+    Returns the mapping stored on the model: ``{'source': name, '<size>': variant name}``.
+    Only touches storage, never the database, so it is safe to run in a worker process.
+    """
+    with storage.open(name, 'rb') as handle:
+        image = ImageOps.exif_transpose(Image.open(handle))
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    variants = {'source': name}
+    for size in settings.THUMBNAIL_SIZES:
+        thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        buffer = BytesIO()
+        thumbnail.save(buffer, settings.THUMBNAIL_FORMAT, quality=settings.THUMBNAIL_QUALITY)
+        target = variant_name(name, size)
+        if storage.exists(target):
+            storage.delete(target)
+        variants[str(size)] = storage.save(target, ContentFile(buffer.getvalue()))
+    return variants
+
+
+def delete_variants(variants, storage=default_storage, keep=()):
+    """Delete the thumbnail files in a variants mapping, except names in ``keep``."""
+    for key, name in variants.items():
+        if key != 'source' and name not in keep:
+            storage.delete(name)
+
+
+def refresh_thumbnails(instance):
+    """Regenerate ``instance.profile_picture_variants`` if the picture changed since the last run.
+
+    Thumbnails of the previous picture are deleted once the change has committed.
+    """
+    picture = instance.profile_picture
+    previous = instance.profile_picture_variants or {}
+    if picture and previous.get('source') != picture.name:
+        variants = render_variants(picture.name, picture.storage)
+    elif not picture and previous:
+        variants = {}
+    else:
+        return
+    # update() rather than save() so this does not re-enter post_save.
+    type(instance).objects.filter(pk=instance.pk).update(profile_picture_variants=variants)
+    instance.profile_picture_variants = variants
+    stale = set(previous.values()) - set(variants.values())
+    if stale:
+        keep = set(variants.values())
+        transaction.on_commit(lambda: delete_variants(previous, picture.storage, keep=keep))
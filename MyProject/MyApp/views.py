@@ -1,11 +1,28 @@
 # MyApp/views.py
+import os
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth import authenticate, login
-from .forms import SignupForm, LoginForm, ProfileForm, AchievementForm
+from .forms import SignupForm, LoginForm, ProfileForm, AchievementForm, CourseBundleForm
 from .models import User
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from .models import Course
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
+from .models import Course, CourseContent, CourseProgress, Enrollment, QuestionStats
+from .caching import aget_catalog_version, aget_profile_version
+from .delivery import aserve_file
+from .exports import DATASETS, FORMATS, aiter_lines, encode, export_rows, parse_moment
+from .imports import BundleError, import_bundle
+from .pagination import decode_cursor, encode_cursor
+from . import search
+from .grading import grade_submission, parse_answers
+from .throttling import allow_login_attempt, client_ip, counters
 
 
 # Signup view
@@ -32,36 +49,146 @@ def login_view(request):
             password = form.cleaned_data['password']
             role = form.cleaned_data['role']
 
-            # Use email for authentication (not username)
-            user = authenticate(request, email=email, password=password)
+            # Throttle before authenticate() so bursts never reach the password hasher.
+            if not allow_login_attempt(client_ip(request), email):
+                messages.error(request, "Too many login attempts. Please wait a few minutes and try again.")
+                return render(request, 'login.html', {'form': form}, status=429)
+
+            # EmailRoleBackend matches email and role in one lookup; a wrong
+            # role costs the same single (dummy) hash as an unknown email.
+            user = authenticate(request, email=email, password=password, role=role)
 
             if user is not None:
-                if user.role == role:  # role match
-                    login(request, user)
-                    messages.success(request, "Login successful 🎉")
-                    return redirect('courses')   # Redirect to courses page
-                else:
-                    messages.error(request, "Role mismatch! Please choose the correct role.")
+                login(request, user)
+                messages.success(request, "Login successful 🎉")
+                return redirect('courses')   # Redirect to courses page
             else:
-                messages.error(request, "Invalid email or password.")
+                messages.error(request, "Invalid email, password or role.")
     else:
         form = LoginForm()
     return render(request, 'login.html', {'form': form})
 
+# The catalog, My Courses, profile and content file views are async: under ASGI
+# they wait on the database, cache and file reads without holding a worker
+# thread. Rendering still happens in a thread, since a template may run a lazy
+# queryset (the catalog does, on a cache miss).
+async def _auser(request):
+    # Resolve the user asynchronously, once, and hand the same object to the
+    # templates so request.user is not loaded a second time while rendering.
+    request.user = await request.auser()
+    return request.user
+
+async def _arender(request, template_name, context):
+    return await sync_to_async(render)(request, template_name, context)
+
 @login_required
-def courses(request):
-    return render(request, 'courses.html')  # create this template
+async def courses(request):
+    # The queryset is lazy: it only runs when the cached listing has expired
+    # or the catalog version has been bumped by a Course/CourseContent change.
+    user = await _auser(request)
+    catalog = Course.objects.with_catalog_stats().order_by('-created_at', 'id')
+    return await _arender(request, 'courses.html', {
+        'courses': catalog,
+        'catalog_version': await aget_catalog_version(),
+        'catalog_cache_timeout': settings.CATALOG_CACHE_TIMEOUT,
+        'profile_version': await aget_profile_version(user.pk),
+    })
 
 def home(request):
     return render(request, 'home.html')
 
 @login_required
-def my_courses(request):
-    return render(request, 'my_courses.html')
+async def my_courses(request):
+    # One query per page: the course is joined in, the next unfinished content
+    # comes from correlated subqueries, and the ?after= cursor seeks past the
+    # previous page instead of OFFSET-scanning it.
+    after = decode_cursor(request.GET.get('after'))
+    if request.GET.get('after') and after is None:
+        raise Http404("Invalid page cursor.")
+    user = await _auser(request)
+    enrollments, next_key = await (
+        user.enrollments.select_related('course').with_next_content()
+        .akeyset_page(after, settings.MY_COURSES_PAGE_SIZE)
+    )
+    return await _arender(request, 'my_courses.html', {
+        'enrollments': enrollments,
+        'next_cursor': encode_cursor(next_key) if next_key else None,
+    })
+
+@login_required
+def search_view(request):
+    # Ranked hits come from the full-text index (MyApp.search); only the
+    # course titles for the hits are loaded, in one query.
+    query = request.GET.get('q', '').strip()
+    hits = search.search(query, limit=settings.SEARCH_RESULT_LIMIT) if query else []
+    courses = Course.objects.only('title').in_bulk({hit.course_id for hit in hits})
+    return render(request, 'search.html', {
+        'query': query,
+        'results': [(hit, courses.get(hit.course_id)) for hit in hits],
+    })
 
 @login_required
-def profile(request):
-    return render(request, 'profile.html')
+def instructor_dashboard(request):
+    # Reads the rollups written by `manage.py refresh_analytics`; nothing here
+    # aggregates Enrollment or QuizAttempt.
+    if request.user.role != 'Instructor' and not request.user.is_staff:
+        raise Http404
+    question_stats = QuestionStats.objects.select_related('question').order_by('question_id')
+    courses = (
+        request.user.created_courses.select_related('stats')
+        .prefetch_related(Prefetch('question_stats', queryset=question_stats))
+        .order_by('title')
+    )
+    return render(request, 'instructor_dashboard.html', {'courses': courses})
+
+@staff_member_required
+def export_data(request, dataset):
+    # Rows are encoded as the client reads them; see MyApp.exports.
+    fmt = request.GET.get('format', 'csv')
+    if dataset not in DATASETS or fmt not in FORMATS:
+        raise Http404("Unknown export.")
+    try:
+        course = int(request.GET['course']) if request.GET.get('course') else None
+        since = parse_moment(request.GET.get('since'))
+        until = parse_moment(request.GET.get('until'), end_of_day=True)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+    columns, rows = export_rows(dataset, course=course, since=since, until=until)
+    lines = encode(fmt, columns, rows)
+    if isinstance(request, ASGIRequest):
+        # Under ASGI a sync iterator would be buffered whole before sending.
+        lines = aiter_lines(lines)
+    response = StreamingHttpResponse(lines, content_type=FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{dataset}.{fmt}"'
+    return response
+
+@login_required
+def import_course_bundle(request, course_id):
+    courses = Course.objects.all() if request.user.is_staff else request.user.created_courses.all()
+    course = get_object_or_404(courses, pk=course_id)
+    form = CourseBundleForm(request.POST or None, request.FILES or None)
+    report = None
+    if request.method == 'POST' and form.is_valid():
+        try:
+            report = import_bundle(form.cleaned_data['bundle'], course, dry_run=form.cleaned_data['dry_run'])
+        except BundleError as exc:
+            form.add_error('bundle', str(exc))
+    return render(request, 'import_bundle.html', {'course': course, 'form': form, 'report': report})
+
+def throttle_metrics(request):
+    # Prometheus text format, for scrapers on INTERNAL_IPS or logged-in staff.
+    # Behind a reverse proxy REMOTE_ADDR is the proxy, so check the forwarded client.
+    # Counts are per worker process, hence the pid label.
+    if not (request.user.is_staff or client_ip(request) in settings.INTERNAL_IPS):
+        raise Http404
+    lines = [
+        '# HELP careercraft_login_throttle_total Login attempts by throttle scope and outcome.',
+        '# TYPE careercraft_login_throttle_total counter',
+    ]
+    pid = os.getpid()
+    for (scope, outcome), value in sorted(counters().items()):
+        lines.append(f'careercraft_login_throttle_total{{scope="{scope}",outcome="{outcome}",pid="{pid}"}} {value}')
+    return HttpResponse('\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4')
 
 def about(request):
     return render(request, 'about.html')
@@ -71,33 +198,92 @@ def contact(request):
 
 @login_required
 def enroll_course(request, course_id):
-    if request.method == "POST":
-        # later we will use DB, for now just success message
-        messages.success(request, f"You have successfully enrolled in course {course_id}!")
+    if request.method != "POST":
+        return redirect('courses')
+
+    course = get_object_or_404(Course, pk=course_id)
+    # Insert first and let the unique (user, course) constraint reject a
+    # double submit, instead of checking for an existing row and racing.
+    try:
+        with transaction.atomic():
+            Enrollment.objects.create(user=request.user, course=course)
+    except IntegrityError:
+        messages.info(request, f"You are already enrolled in {course.title}.")
+    else:
+        messages.success(request, f"You have successfully enrolled in {course.title}!")
+    return redirect('my_courses')
+
+@login_required
+def complete_content(request, content_id):
+    if request.method != "POST":
         return redirect('my_courses')
 
-    return redirect('courses')
+    content = get_object_or_404(CourseContent, pk=content_id, course__enrollments__user=request.user)
+    if CourseProgress.objects.complete(request.user, content):
+        messages.success(request, f"Marked {content.title} as completed.")
+    return redirect('my_courses')
 
 @login_required
-def profile_view(request):
-    user = request.user
-    enrolled = user.enrolledcourse_set.select_related('course').all()
-    completed = enrolled.filter(is_completed=True)
-    achievements = user.achievement_set.all()
-    
-    return render(request, 'profile.html', {
+def course_quiz(request, course_id):
+    course = get_object_or_404(Course, pk=course_id, enrollments__user=request.user)
+    if request.method == "POST":
+        result = grade_submission(request.user, course, parse_answers(request.POST))
+        messages.success(request, f"You answered {result.correct} of {result.total} correctly ({result.score}%).")
+        return redirect('course_quiz', course_id=course.id)
+
+    questions = course.quiz_questions.order_by('pk')
+    return render(request, 'quiz.html', {'course': course, 'questions': questions})
+
+CONTENT_FILE_FIELDS = {'video': 'video_file', 'pdf': 'pdf_file'}
+
+@login_required
+async def content_file(request, content_id, kind):
+    # Long downloads are the point of this view being async: the body is an
+    # async iterator, so a slow client does not pin a worker for the transfer.
+    if kind not in CONTENT_FILE_FIELDS:
+        raise Http404("Unknown content file.")
+    user = await _auser(request)
+    contents = CourseContent.objects.all()
+    if not user.is_staff:
+        contents = contents.filter(course__enrollments__user=user)
+    try:
+        content = await contents.only(CONTENT_FILE_FIELDS[kind]).aget(pk=content_id)
+    except CourseContent.DoesNotExist:
+        raise Http404("No such content.")
+    field_file = getattr(content, CONTENT_FILE_FIELDS[kind])
+    if not field_file:
+        raise Http404("This content has no file of that type.")
+    return await aserve_file(request, field_file)
+
+@login_required
+async def profile_view(request):
+    # One query per list regardless of how many rows the user has: the
+    # related courses are joined in, and completed courses are filtered in
+    # memory from the enrollments we already loaded.
+    user = await _auser(request)
+    enrolled = [enrollment async for enrollment in user.enrollments.select_related('course').order_by('-enrolled_at')]
+    completed = [enrollment for enrollment in enrolled if enrollment.is_completed]
+    achievements = [
+        achievement async for achievement in user.achievements.select_related('course').order_by('-date_awarded')
+    ]
+
+    return await _arender(request, 'profile.html', {
         'user': user,
+        'profile': user.profile,
         'enrolled_courses': enrolled,
         'completed_courses': completed,
         'achievements': achievements,
+        'profile_version': await aget_profile_version(user.pk),
     })
+
 @login_required
 def edit_profile(request):
     profile = request.user.profile
     if request.method == 'POST':
         form = ProfileForm(request.POST, request.FILES, instance=profile)
         if form.is_valid():
-            form.save()
+            if form.has_changed():
+                profile.save(update_fields=form.changed_data)
             return redirect('profile')  # Redirect to profile page
     else:
         form = ProfileForm(instance=profile)
@@ -27,6 +27,9 @@ DEBUG = True
 
 ALLOWED_HOSTS = []
 
+# Addresses allowed to scrape /metrics/throttle/ without logging in.
+INTERNAL_IPS = ['127.0.0.1']
+
 
 # Application definition
 
@@ -48,23 +51,35 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'MyApp.middleware.ReadReplicaMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'MyProject.urls'
 import os
 
+# Outside DEBUG, compiled templates are kept in memory by the cached loader so
+# base.html and its children are parsed once per process instead of per request.
+# DEBUG reads them from disk every time so edits show up without a restart.
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if not DEBUG:
+    TEMPLATE_LOADERS = [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS':  [os.path.join(BASE_DIR, 'MyApp', 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'MyApp.context_processors.profile_fragments',
             ],
+            'loaders': TEMPLATE_LOADERS,
         },
     },
 ]
@@ -75,12 +90,200 @@ WSGI_APPLICATION = 'MyProject.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# SQLite by default. Set DB_ENGINE=postgresql (plus DB_NAME, DB_USER, DB_PASSWORD,
+# DB_HOST, DB_PORT) for production. DB_POOL=1 switches to Django's native psycopg
+# pool instead of persistent per-worker connections (CONN_MAX_AGE); the two are
+# mutually exclusive. DB_REPLICA_HOST adds a 'replica' alias used by
+# MyApp.routers.ReplicaRouter for the read-only views in READ_REPLICA_VIEWS.
+def env_flag(name, default=False):
+    return os.environ.get(name, str(default)).lower() in ('1', 'true', 'yes', 'on')
+
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite3')
+
+if DB_ENGINE == 'postgresql':
+    DB_POOL = env_flag('DB_POOL')
+    primary = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('DB_NAME', 'careercraft'),
+        'USER': os.environ.get('DB_USER', 'careercraft'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+        'HOST': os.environ.get('DB_HOST', 'localhost'),
+        'PORT': os.environ.get('DB_PORT', '5432'),
+        'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': not DB_POOL,
+        'OPTIONS': {},
+    }
+    if DB_POOL:
+        primary['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        }
+    DATABASES = {'default': primary}
+    if os.environ.get('DB_REPLICA_HOST'):
+        DATABASES['replica'] = {
+            **primary,
+            'HOST': os.environ['DB_REPLICA_HOST'],
+            'PORT': os.environ.get('DB_REPLICA_PORT', primary['PORT']),
+            'OPTIONS': dict(primary['OPTIONS']),
+            'TEST': {'MIRROR': 'default'},
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+        }
     }
+
+# Opt-in SQLite tuning for small deployments (MyApp.sqlite_tuning applies the
+# pragmas on connection_created). WAL lets readers run alongside the single
+# writer, and IMMEDIATE transactions take the write lock up front, so workers
+# queue on busy_timeout instead of failing with "database is locked".
+SQLITE_PERFORMANCE_MODE = DB_ENGINE == 'sqlite3' and env_flag('DB_SQLITE_TUNING')
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,        # KiB, i.e. 64 MB
+    'mmap_size': 268435456,      # 256 MB
+    'busy_timeout': 5000,        # ms
+    'temp_store': 'MEMORY',
 }
+if SQLITE_PERFORMANCE_MODE:
+    DATABASES['default']['OPTIONS'] = {'transaction_mode': 'IMMEDIATE'}
+
+DATABASE_ROUTERS = ['MyApp.routers.ReplicaRouter']
+
+# URL names whose GET/HEAD requests may read from the replica.
+READ_REPLICA_VIEWS = {'courses', 'my_courses', 'profile'}
+# After a request writes, that client reads from the primary for this long so
+# it sees its own writes despite replication lag.
+REPLICA_PIN_SECONDS = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Per-process memory by default. Set REDIS_URL in production so the catalog
+# version, answer keys, login throttles and cache-backed sessions are shared by
+# every worker.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'careercraft',
+        }
+    }
+
+# Sessions
+# https://docs.djangoproject.com/en/5.2/topics/http/sessions/
+#
+# SESSION_BACKEND=cached_db reads sessions from the cache and only falls back to
+# django_session on a miss; writes go to both. SESSION_BACKEND=cache skips the
+# database entirely (sessions are lost if the cache is flushed, so use it only with
+# a persistent cache). SESSION_BACKEND=db is Django's default. Both cache-backed
+# engines need a cache shared by every worker: on the per-process LocMem cache a
+# logout only evicts the session in one worker, and the others keep accepting it.
+# So the default is cached_db with REDIS_URL and db without, and the MyApp.E001
+# check refuses the cache-backed engines on LocMem.
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+}[os.environ.get('SESSION_BACKEND', 'cached_db' if os.environ.get('REDIS_URL') else 'db')]
+
+# Flash messages are short, so keep them in a signed cookie instead of the session;
+# rendering or adding a message then never loads or saves the session.
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+# Rendered course listing lifetime; edits to courses invalidate it sooner.
+# Enrollments never do (single, bulk command or admin action alike), so the
+# listed enrollment counts may lag by up to this long.
+CATALOG_CACHE_TIMEOUT = 300
+
+# Lifetime of the per-user nav bar and profile header fragments; saving the
+# User or Profile invalidates them sooner.
+PROFILE_FRAGMENT_TIMEOUT = 600
+
+# Enrollments per My Courses page (keyset-paginated on enrolled_at, id).
+MY_COURSES_PAGE_SIZE = 20
+
+# Hits shown by the course/content search page (MyApp.search).
+SEARCH_RESULT_LIMIT = 20
+
+# Rows fetched per round trip by the CSV/JSONL exports (MyApp.exports).
+EXPORT_CHUNK_SIZE = 2000
+
+# Rows per bulk_create batch when importing course bundles (MyApp.imports).
+IMPORT_BATCH_SIZE = 500
+
+# Admin changelists count at most this many matching rows; unfiltered lists of
+# larger tables show the planner's estimate instead (MyApp.pagination).
+ADMIN_COUNT_LIMIT = 10000
+
+# Seconds the instructor analytics watermark trails each refresh, so rows written
+# by transactions still open during a `manage.py refresh_analytics` run are picked
+# up by the next one.
+ANALYTICS_WATERMARK_OVERLAP = 60
+
+# Course answer keys kept in each worker's memory in front of the shared cache.
+QUIZ_ANSWER_KEY_CACHE_SIZE = 256
+# Seconds an answer key is cached (in the shared cache and in each worker). Saves
+# invalidate it at once when the cache is shared; this bounds how stale another
+# worker's key can be on the per-process default cache.
+QUIZ_ANSWER_KEY_TIMEOUT = 300
+
+
+# Authentication
+# https://docs.djangoproject.com/en/5.2/topics/auth/passwords/
+
+AUTHENTICATION_BACKENDS = ['MyApp.backends.EmailRoleBackend']
+
+# Password hashing cost. New and re-hashed passwords use the first hasher below;
+# Argon2 is preferred when argon2-cffi is installed (see the README). Without it,
+# PBKDF2-SHA256 runs at OWASP's recommended 600,000 iterations rather than
+# Django's 1,000,000. Changing a cost re-hashes each password transparently on its
+# owner's next successful login.
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 600_000))
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+# OWASP's minimum Argon2id profile (19 MiB, t=2, p=1) by default.
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 19456))  # KiB
+PASSWORD_ARGON2_PARALLELISM = int(os.environ.get('PASSWORD_ARGON2_PARALLELISM', 1))
+
+PASSWORD_HASHERS = [
+    'MyApp.hashers.TunedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+try:
+    import argon2  # noqa: F401
+except ImportError:
+    pass
+else:
+    PASSWORD_HASHERS.insert(0, 'MyApp.hashers.TunedArgon2PasswordHasher')
+
+
+# Login throttling (MyApp.throttling): attempts allowed per (capacity, seconds),
+# checked before any password is hashed.
+LOGIN_THROTTLE_RATES = {
+    'ip': (20, 60),
+    'email': (5, 300),
+}
+# Keys each worker tracks locally before it starts forgetting the oldest.
+THROTTLE_LOCAL_KEYS = 10000
+# Reverse proxies (comma-separated addresses in TRUSTED_PROXIES) whose
+# X-Forwarded-For header names the client for login throttling. Behind nginx, set
+# it to nginx's address and use `proxy_set_header X-Forwarded-For
+# $proxy_add_x_forwarded_for;`; otherwise every client shares the proxy's IP bucket.
+TRUSTED_PROXIES = [address.strip() for address in os.environ.get('TRUSTED_PROXIES', '').split(',') if address.strip()]
 
 
 # Password validation
@@ -124,6 +327,44 @@ STATICFILES_DIRS = [
 
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 
+# Outside DEBUG, collectstatic writes content-hashed file names plus a manifest,
+# so the web server can send far-future cache headers for everything under
+# STATIC_URL (see README). DEBUG keeps plain names so no collectstatic is needed.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'
+        ),
+    },
+}
+
+# Course artwork variants written by `manage.py build_course_images` into the
+# global static folder above (MyApp.templatetags.course_images reads the manifest).
+COURSE_IMAGE_BUILD_DIR = os.path.join(BASE_DIR, "static")
+COURSE_IMAGE_WIDTHS = (320, 640)
+COURSE_IMAGE_QUALITY = 80
+
+# Uploaded files (profile pictures, course videos and PDFs)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+
+# Course files are streamed by MyApp.delivery in chunks of this many bytes.
+CONTENT_STREAM_CHUNK_SIZE = 64 * 1024
+# Set to 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache/lighttpd) to let the
+# web server send course files after the view has checked enrollment.
+CONTENT_SENDFILE_MODE = os.environ.get('CONTENT_SENDFILE_MODE') or None
+# nginx internal location that maps onto MEDIA_ROOT, used with x-accel-redirect.
+CONTENT_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
+# Square profile picture thumbnails generated on upload (MyApp.thumbnails).
+THUMBNAIL_SIZES = (40, 120, 240)
+THUMBNAIL_FORMAT = 'WEBP'
+THUMBNAIL_QUALITY = 80
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
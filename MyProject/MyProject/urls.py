@@ -26,8 +26,8 @@ urlpatterns = [
     path('signup/', views.signup_view, name='signup'),
     path('courses/', views.courses, name='courses'),
 
+    path('search/', views.search_view, name='search'),
     path('my-courses/', views.my_courses, name='my_courses'),
-    path('profile/', views.profile, name='profile'),
     path('about/', views.about, name='about'),
     path('contact/', views.contact, name='contact'),
 
@@ -37,5 +37,12 @@ urlpatterns = [
     path('logout/', auth_views.LogoutView.as_view(next_page='login'), name='logout'),
 
     path("courses/enroll/<int:course_id>/", views.enroll_course, name="enroll_course"),
+    path("courses/content/<int:content_id>/complete/", views.complete_content, name="complete_content"),
+    path("courses/<int:course_id>/quiz/", views.course_quiz, name="course_quiz"),
+    path("courses/content/<int:content_id>/<str:kind>/", views.content_file, name="content_file"),
+    path('instructor/analytics/', views.instructor_dashboard, name='instructor_dashboard'),
+    path('instructor/courses/<int:course_id>/import/', views.import_course_bundle, name='import_course_bundle'),
+    path('exports/<str:dataset>/', views.export_data, name='export_data'),
+    path('metrics/throttle/', views.throttle_metrics, name='throttle_metrics'),
     path('admin/', admin.site.urls),
 ]